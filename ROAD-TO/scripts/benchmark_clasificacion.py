@@ -0,0 +1,375 @@
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import unicodedata
+from pathlib import Path
+
+import generar_clasificacion_equipos as clasificacion
+
+
+FIRST_NAMES = [
+    "Carlos",
+    "Rubén",
+    "Alejandro",
+    "Airam",
+    "Sergio",
+    "Juan",
+    "Noé",
+    "Iván",
+    "José",
+    "Fran",
+    "Iñaki",
+    "Borja",
+    "Ana",
+    "María",
+    "Lucía",
+    "Pablo",
+    "Eloy",
+    "Miguel Ángel",
+    "Juan Manuel",
+    "Piero",
+]
+
+LAST_NAMES = [
+    "Calvo",
+    "Garrés",
+    "Cutillas",
+    "Cabrera",
+    "Cardoso",
+    "Moreno",
+    "Casal",
+    "Sánchez",
+    "Cortiñas",
+    "Pérez",
+    "Souto",
+    "López",
+    "Gutiérrez",
+    "Núñez",
+    "Peñafuerte",
+    "Díaz",
+    "Hernández",
+    "Reyes",
+    "Martín",
+    "Morales",
+]
+
+COUNTRY_SUFFIXES = [" Spain", " (ESP)", " España", " Italia", " Portugal"]
+
+PHASES = (
+    "load",
+    "read_teams",
+    "read_scores",
+    "normalize_name",
+    "find_score",
+    "compute_results",
+    "html",
+    "pdf",
+    "xlsx",
+)
+
+
+def strip_accents(value):
+    decomposed = unicodedata.normalize("NFD", value)
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+
+
+def add_typo(value, rng):
+    letters = [idx for idx, ch in enumerate(value) if ch.isalpha()]
+    if len(letters) < 2:
+        return value
+    idx = rng.choice(letters[:-1])
+    if rng.random() < 0.5:
+        return value[:idx] + value[idx + 1] + value[idx] + value[idx + 2 :]
+    return value[:idx] + value[idx + 1 :]
+
+
+def noisy_name(name, rng, noise):
+    """Nombre tal y como podria aparecer en una hoja de clasificacion."""
+    if rng.random() < noise:
+        name = strip_accents(name)
+    if rng.random() < noise:
+        name += rng.choice(COUNTRY_SUFFIXES)
+    if rng.random() < noise / 3:
+        name = name.upper()
+    if rng.random() < noise / 3:
+        name = add_typo(name, rng)
+    return name
+
+
+def generate_season(teams, roster, field, stages, noise, seed):
+    rng = random.Random(seed)
+    field = max(field, teams * roster)
+    people = []
+    seen = set()
+    while len(people) < field:
+        name = (
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} "
+            f"{rng.choice(LAST_NAMES)} {len(people) + 1}"
+        )
+        if name not in seen:
+            seen.add(name)
+            people.append(name)
+    pool = people[:]
+    rng.shuffle(pool)
+    team_map = {
+        f"EQUIPO {idx + 1} FG": [pool.pop() for _ in range(roster)]
+        for idx in range(teams)
+    }
+    stage_rows = []
+    for stage_idx in range(stages):
+        entries = [
+            (noisy_name(name, rng, noise), rng.randint(48, 95))
+            for name in people
+            if rng.random() > 0.15
+        ]
+        entries.sort(key=lambda entry: entry[1])
+        rows = [(pos, name, strokes) for pos, (name, strokes) in enumerate(entries, 1)]
+        stage_rows.append((f"Clasificacion etapa {stage_idx + 1} 2026", rows))
+    return team_map, stage_rows
+
+
+def write_workbook(path, team_map, stage_rows):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Equipos")
+    names = list(team_map)
+    ws.append(names)
+    depth = max((len(players) for players in team_map.values()), default=0)
+    for idx in range(depth):
+        ws.append(
+            [
+                team_map[name][idx] if idx < len(team_map[name]) else None
+                for name in names
+            ]
+        )
+    for sheet_name, rows in stage_rows:
+        ws = wb.create_sheet(sheet_name)
+        ws.append(["Pos", "Jugador", "Golpes"])
+        for row in rows:
+            ws.append(list(row))
+    wb.save(path)
+
+
+def time_phase(timings, name, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    timings.setdefault(name, []).append(time.perf_counter() - started)
+    return result
+
+
+def read_all_scores(wb, sheet_names):
+    clasificacion.NAME_NORMALIZER.cache_clear()
+    return [
+        (name, clasificacion.read_scores(clasificacion.stream_sheet(wb, name)))
+        for name in sheet_names
+    ]
+
+
+def normalize_all(names):
+    clasificacion.NAME_NORMALIZER.cache_clear()
+    for name in names:
+        clasificacion.normalize_name(name)
+
+
+def match_all(teams, stages):
+    for _, scores in stages:
+        matcher = clasificacion.PlayerMatcher(scores)
+        for players in teams.values():
+            for player in players:
+                clasificacion.find_score(player, matcher)
+
+
+def compute_model(teams, stages, stage_count):
+    engine = clasificacion.SeasonEngine(teams)
+    engine.add_stages(stages)
+    return engine.model(stage_count)
+
+
+def write_back(input_path, output_path, model):
+    shutil.copyfile(input_path, output_path)
+    clasificacion.write_classification_xlsx(output_path, model)
+
+
+def run_once(workbook_path, sheet_names, workdir, timings, skip):
+    wb = time_phase(timings, "load", clasificacion.open_workbook_stream, workbook_path)
+    try:
+        teams = time_phase(
+            timings,
+            "read_teams",
+            clasificacion.read_teams,
+            clasificacion.stream_sheet(wb, "Equipos"),
+        )
+        stages = time_phase(timings, "read_scores", read_all_scores, wb, sheet_names)
+    finally:
+        wb.close()
+
+    raw_names = [player for players in teams.values() for player in players]
+    raw_names.extend(entry[0] for _, scores in stages for entry in scores.values())
+    time_phase(timings, "normalize_name", normalize_all, raw_names)
+    time_phase(timings, "find_score", match_all, teams, stages)
+    model = time_phase(
+        timings, "compute_results", compute_model, teams, stages, len(stages)
+    )
+    if "html" not in skip:
+        time_phase(
+            timings,
+            "html",
+            clasificacion.build_html,
+            model,
+            workdir / "bench.html",
+            clasificacion.LOGO_PATH,
+        )
+    if "pdf" not in skip and clasificacion.load_pdf_kit() is not None:
+        time_phase(
+            timings,
+            "pdf",
+            clasificacion.build_pdf,
+            model,
+            workdir / "bench.pdf",
+            clasificacion.LOGO_PATH,
+        )
+    if "xlsx" not in skip:
+        time_phase(
+            timings, "xlsx", write_back, workbook_path, workdir / "bench.xlsx", model
+        )
+
+
+def summarize(timings):
+    return {
+        name: {
+            "min": min(timings[name]),
+            "median": statistics.median(timings[name]),
+            "runs": len(timings[name]),
+        }
+        for name in PHASES
+        if name in timings
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Fases cuya mediana empeora mas de ``tolerance`` respecto a la base."""
+    regressions = []
+    for name, current in report["phases"].items():
+        previous = baseline.get("phases", {}).get(name)
+        if not previous or not previous["median"]:
+            continue
+        ratio = current["median"] / previous["median"]
+        status = "REGRESION" if ratio > 1 + tolerance else "ok"
+        print(
+            f"{name:16} {previous['median'] * 1000:9.1f} ms -> "
+            f"{current['median'] * 1000:9.1f} ms  x{ratio:.2f}  {status}"
+        )
+        if status != "ok":
+            regressions.append(name)
+    if baseline.get("config") != report["config"]:
+        print("Aviso: la base se midio con otra configuracion.", file=sys.stderr)
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Mide por fases la clasificacion por equipos con datos sinteticos."
+    )
+    parser.add_argument("--teams", type=int, default=60, help="Numero de equipos.")
+    parser.add_argument(
+        "--roster", type=int, default=8, help="Jugadores por equipo."
+    )
+    parser.add_argument(
+        "--field",
+        type=int,
+        default=800,
+        help="Jugadores en cada clasificacion individual.",
+    )
+    parser.add_argument("--stages", type=int, default=3, help="Numero de etapas.")
+    parser.add_argument(
+        "--noise",
+        type=float,
+        default=0.3,
+        help="Probabilidad de acentos perdidos, sufijos de pais, mayusculas y erratas.",
+    )
+    parser.add_argument("--seed", type=int, default=2026, help="Semilla aleatoria.")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Repeticiones de cada medicion."
+    )
+    parser.add_argument(
+        "--skip",
+        nargs="*",
+        default=[],
+        choices=["html", "pdf", "xlsx"],
+        help="Fases de salida que no se miden.",
+    )
+    parser.add_argument(
+        "--workdir",
+        default=None,
+        help="Directorio para el Excel sintetico y las salidas (temporal por defecto).",
+    )
+    parser.add_argument(
+        "--output-json", default=None, help="Guarda los resultados como base JSON."
+    )
+    parser.add_argument(
+        "--compare", default=None, help="Base JSON con la que comparar los resultados."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Empeoramiento relativo de la mediana que cuenta como regresion.",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = {
+        "teams": args.teams,
+        "roster": args.roster,
+        "field": args.field,
+        "stages": args.stages,
+        "noise": args.noise,
+        "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-clasificacion-") as tmp:
+        workdir = Path(args.workdir or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        workbook_path = workdir / "sintetico.xlsx"
+        team_map, stage_rows = generate_season(
+            args.teams, args.roster, args.field, args.stages, args.noise, args.seed
+        )
+        write_workbook(workbook_path, team_map, stage_rows)
+        sheet_names = [name for name, _ in stage_rows]
+
+        timings = {}
+        for _ in range(args.repeat):
+            run_once(workbook_path, sheet_names, workdir, timings, set(args.skip))
+
+    report = {
+        "config": config,
+        "python": platform.python_version(),
+        "phases": summarize(timings),
+    }
+    for name, phase in report["phases"].items():
+        print(
+            f"{name:16} min {phase['min'] * 1000:9.1f} ms  "
+            f"mediana {phase['median'] * 1000:9.1f} ms"
+        )
+    if args.output_json:
+        Path(args.output_json).write_text(
+            json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+        )
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(f"Comparacion con {args.compare}:")
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,30 @@
 import argparse
 import base64
+import bisect
+import csv
+import functools
+import hashlib
+import importlib
+import io
+import json
+import os
+import pickle
+import posixpath
 import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
 import unicodedata
+import zipfile
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from html import escape, unescape
 from pathlib import Path
-
-from openpyxl import load_workbook
+from xml.etree import ElementTree
 
 
 COUNTRY_TOKENS = [
@@ -30,23 +50,227 @@ COUNTRY_TOKENS = [
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 LOGO_PATH = BASE_DIR / "assets" / "logo.png"
+FONT_DIR = BASE_DIR / "assets" / "fonts"
+CACHE_DIR = BASE_DIR / ".cache" / "clasificacion"
+
+OUTPUT_FORMATS = ("html", "pdf", "xlsx", "csv", "parquet")
+IMPORT_TIMES = {}
+
+
+class Instrumentation:
+    """Tiempos por fase, contadores, aciertos de cache y memoria maxima.
+
+    Mientras esta apagada ``phase`` devuelve siempre el mismo contexto vacio
+    y ``count`` retorna sin mas, de modo que el coste queda en una
+    comprobacion de atributo por llamada.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.counters = defaultdict(int)
+        self.caches = {}
+        self._origin = 0
+
+    def enable(self):
+        self.enabled = True
+        self._origin = time.perf_counter_ns()
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NO_PHASE
+        return self._phase(name)
+
+    @contextmanager
+    def _phase(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.events.append((name, start, time.perf_counter_ns() - start))
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] += value
+
+    def track_cache(self, name, cache):
+        """Registra un objeto con ``hits`` y ``misses`` para el informe."""
+        if self.enabled:
+            self.caches[name] = cache
+
+    def report(self):
+        phases = {}
+        for name, _, duration in self.events:
+            phase = phases.setdefault(name, {"seconds": 0.0, "calls": 0})
+            phase["seconds"] += duration / 1e9
+            phase["calls"] += 1
+        caches = {}
+        for name, cache in self.caches.items():
+            hits, misses = cache.hits, cache.misses
+            total = hits + misses
+            caches[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / total if total else None,
+            }
+        return {
+            "phases": phases,
+            "counters": dict(self.counters),
+            "caches": caches,
+            "peak_memory_bytes": peak_memory_bytes(),
+        }
+
+    def print_report(self, file=sys.stderr):
+        report = self.report()
+        for name, phase in report["phases"].items():
+            print(
+                f"{name:24} {phase['seconds'] * 1000:10.1f} ms  x{phase['calls']}",
+                file=file,
+            )
+        for name, value in report["counters"].items():
+            print(f"{name:24} {value:10d}", file=file)
+        for name, cache in report["caches"].items():
+            rate = cache["hit_rate"]
+            rate = "-" if rate is None else f"{rate:.1%}"
+            print(
+                f"{name:24} {rate:>10} aciertos "
+                f"({cache['hits']}/{cache['hits'] + cache['misses']})",
+                file=file,
+            )
+        if report["peak_memory_bytes"] is not None:
+            peak = report["peak_memory_bytes"] / 2**20
+            print(f"{'memoria maxima':24} {peak:10.1f} MB", file=file)
+
+    def write_json(self, path):
+        Path(path).write_text(
+            json.dumps(self.report(), indent=2, ensure_ascii=False) + "\n",
+            encoding="utf-8",
+        )
+
+    def write_chrome_trace(self, path):
+        """Exporta las fases en el formato de chrome://tracing y Perfetto."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": 0,
+            }
+            for name, start, duration in self.events
+        ]
+        for name, value in self.counters.items():
+            events.append(
+                {"name": name, "ph": "C", "ts": 0, "pid": pid, "args": {name: value}}
+            )
+        Path(path).write_text(json.dumps({"traceEvents": events}), encoding="utf-8")
+
+
+_NO_PHASE = nullcontext()
+
+
+def peak_memory_bytes():
+    try:
+        import resource
+    except ModuleNotFoundError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+INSTRUMENTS = Instrumentation()
+
+
+def lazy_import(name):
+    module = sys.modules.get(name)
+    if module is None:
+        start = time.perf_counter()
+        with INSTRUMENTS.phase(f"import {name}"):
+            module = importlib.import_module(name)
+        IMPORT_TIMES[name] = time.perf_counter() - start
+    return module
+
+
+def load_workbook(*args, **kwargs):
+    return lazy_import("openpyxl").load_workbook(*args, **kwargs)
+
+
+NORMALIZE_CACHE_SIZE = 65536
+NORMALIZER_VERSION = 1
+
+_COPYRIGHT_RE = re.compile(r"[\u00A9]")
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+_SPACES_RE = re.compile(r"\s+")
+
+
+def fold_text(text: str) -> str:
+    """Minusculas sin acentos ni signos y con un solo espacio entre palabras."""
+    text = _NON_WORD_RE.sub(" ", text).lower().strip()
+    if not text.isascii():
+        text = unicodedata.normalize("NFD", text)
+        text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+class NameNormalizer:
+    """Normalizador de nombres con patrones precompilados y cache LRU.
+
+    Una unica alternancia con todos los tokens de pais descarta en una sola
+    busqueda los nombres que no contienen ninguno; solo cuando hay
+    coincidencia se aplican los patrones por token en el orden original,
+    de modo que el resultado es identico al de la version sin cache.
+    """
+
+    def __init__(self, tokens=COUNTRY_TOKENS, maxsize=NORMALIZE_CACHE_SIZE):
+        escaped = [re.escape(token) for token in tokens]
+        alternation = "|".join(escaped)
+        self._country_re = re.compile(
+            rf"\b(?:{alternation})\b|(?:{alternation})\s*$", re.IGNORECASE
+        )
+        self._token_res = [
+            (
+                re.compile(rf"\b{token}\b", re.IGNORECASE),
+                re.compile(rf"{token}\s*$", re.IGNORECASE),
+            )
+            for token in escaped
+        ]
+        self._cached = functools.lru_cache(maxsize=maxsize)(self._normalize)
+
+    def __call__(self, value) -> str:
+        if not value:
+            return ""
+        return self._cached(str(value))
+
+    def _normalize(self, raw: str) -> str:
+        name = raw.strip()
+        if self._country_re.search(name):
+            for word_re, tail_re in self._token_res:
+                name = word_re.sub("", name)
+                name = tail_re.sub("", name)
+        return fold_text(_COPYRIGHT_RE.sub("", name))
+
+    @property
+    def hits(self) -> int:
+        return self._cached.cache_info().hits
+
+    @property
+    def misses(self) -> int:
+        return self._cached.cache_info().misses
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    def cache_clear(self):
+        self._cached.cache_clear()
+
+
+NAME_NORMALIZER = NameNormalizer()
 
 
 def normalize_name(value: str) -> str:
-    if not value:
-        return ""
-    name = str(value).strip()
-    for token in COUNTRY_TOKENS:
-        escaped = re.escape(token)
-        name = re.sub(rf"\b{escaped}\b", "", name, flags=re.IGNORECASE)
-        name = re.sub(rf"{escaped}\s*$", "", name, flags=re.IGNORECASE)
-    name = re.sub(r"[\u00A9]", "", name)
-    name = re.sub(r"[\W_]+", " ", name, flags=re.UNICODE)
-    name = name.lower().strip()
-    name = unicodedata.normalize("NFD", name)
-    name = "".join(ch for ch in name if unicodedata.category(ch) != "Mn")
-    name = re.sub(r"\s+", " ", name).strip()
-    return name
+    return NAME_NORMALIZER(value)
 
 
 def read_scores(ws):
@@ -67,207 +291,1918 @@ def read_scores(ws):
 
 
 def read_teams(ws):
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, ())
+    if [str(value or "").strip().lower() for value in header[:2]] == [
+        "equipo",
+        "jugador",
+    ]:
+        return read_team_pairs(rows)
+    columns = [[] for _ in header]
+    for row in rows:
+        for col_idx, value in enumerate(row[: len(header)]):
+            if value:
+                columns[col_idx].append(str(value).strip())
     teams = {}
-    header = [cell.value for cell in ws[1]]
-    for col_idx, team_name in enumerate(header, start=1):
+    for team_name, players in zip(header, columns):
         if not team_name:
             continue
         team = str(team_name).strip()
-        players = []
-        for row_idx in range(2, ws.max_row + 1):
-            value = ws.cell(row=row_idx, column=col_idx).value
-            if value:
-                players.append(str(value).strip())
         if players:
             teams[team] = players
     return teams
 
 
-def find_score(player, scores, score_keys):
-    key = normalize_name(player)
-    if not key:
+def read_team_pairs(rows):
+    """Plantillas en formato largo (``Equipo``, ``Jugador``), una fila por jugador."""
+    teams = {}
+    for row in rows:
+        if len(row) < 2 or not row[0] or not row[1]:
+            continue
+        teams.setdefault(str(row[0]).strip(), []).append(str(row[1]).strip())
+    return teams
+
+
+def open_workbook_stream(input_path):
+    return load_workbook(input_path, read_only=True, data_only=True)
+
+
+def stream_sheet(wb, sheet_name):
+    ws = wb[sheet_name]
+    ws.reset_dimensions()
+    return ws
+
+
+XLSX_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+XLSX_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+XLSX_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def xlsx_sheet_parts(archive):
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {}
+    for rel in rels.iter(f"{XLSX_PKG_REL_NS}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = f"xl/{target}"
+        targets[rel.get("Id")] = target
+    parts = {}
+    for sheet in workbook.iter(f"{XLSX_MAIN_NS}sheet"):
+        part = targets.get(sheet.get(f"{XLSX_REL_NS}id"))
+        if part:
+            parts[sheet.get("name")] = part
+    return parts
+
+
+class SheetCache:
+    """Cache en disco de hojas ya leidas y normalizadas.
+
+    La clave combina el XML de la hoja dentro del ``.xlsx``, la tabla de
+    cadenas compartidas, el lector usado y ``NORMALIZER_VERSION``, asi que
+    una hoja sin cambios se recupera sin pasar por openpyxl.
+    """
+
+    FORMAT_VERSION = 2
+    MEMORY_ENTRIES = 64
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._memory = {}
+
+    def key(self, *parts):
+        digest = hashlib.sha256()
+        digest.update(f"v{self.FORMAT_VERSION}:n{NORMALIZER_VERSION}".encode("ascii"))
+        for part in parts:
+            digest.update(b"\0")
+            if not isinstance(part, bytes):
+                part = str(part).encode("utf-8")
+            digest.update(part)
+        return digest.hexdigest()
+
+    def load(self, key):
+        if key in self._memory:
+            self.hits += 1
+            return self._memory[key]
+        if self.cache_dir is None:
+            self.misses += 1
+            return None
+        path = self.cache_dir / f"{key}.pickle"
+        try:
+            with path.open("rb") as handle:
+                data = pickle.load(handle)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, data)
+        return data
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        while len(self._memory) > self.MEMORY_ENTRIES:
+            self._memory.pop(next(iter(self._memory)))
+
+    def store(self, key, data):
+        self._remember(key, data)
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{key}.pickle"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("wb") as handle:
+            pickle.dump(data, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+class WorkbookReader:
+    """Lee hojas de un ``.xlsx`` pasando por ``SheetCache`` cuando existe.
+
+    El libro solo se abre con openpyxl la primera vez que una hoja no esta
+    en cache.
+    """
+
+    def __init__(self, input_path, cache=None):
+        self.input_path = Path(input_path)
+        self.cache = cache
+        self._wb = None
+        self._fingerprints = None
+
+    def read(self, sheet_name, reader):
+        key = None
+        if self.cache is not None:
+            fingerprint = self._fingerprint(sheet_name)
+            if fingerprint is not None:
+                key = self.cache.key(reader.__name__, sheet_name, fingerprint)
+                data = self.cache.load(key)
+                if data is not None:
+                    return data
+        if self._wb is None:
+            with INSTRUMENTS.phase("load"):
+                self._wb = open_workbook_stream(self.input_path)
+        with INSTRUMENTS.phase(reader.__name__):
+            data = reader(stream_sheet(self._wb, sheet_name))
+        if key is not None:
+            self.cache.store(key, data)
+        return data
+
+    def _fingerprint(self, sheet_name):
+        if self._fingerprints is None:
+            self._fingerprints = {}
+            try:
+                with zipfile.ZipFile(self.input_path) as archive:
+                    names = set(archive.namelist())
+                    shared = b""
+                    if "xl/sharedStrings.xml" in names:
+                        shared = archive.read("xl/sharedStrings.xml")
+                        shared = hashlib.sha256(shared).digest()
+                    for name, part in xlsx_sheet_parts(archive).items():
+                        if part in names:
+                            digest = hashlib.sha256(archive.read(part)).digest()
+                            self._fingerprints[name] = digest + shared
+            except (KeyError, OSError, zipfile.BadZipFile, ElementTree.ParseError):
+                pass
+        return self._fingerprints.get(sheet_name)
+
+    def close(self):
+        if self._wb is not None:
+            self._wb.close()
+            self._wb = None
+
+
+class CsvSheet:
+    """Adapta un CSV a la interfaz ``iter_rows`` que usan los lectores de hojas."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def iter_rows(self, min_row=1, values_only=True):
+        with self.path.open(newline="", encoding="utf-8-sig") as handle:
+            # Lineas completas: una cabecera de plantillas puede pasar de 4 KB.
+            sample = ""
+            for line in handle:
+                sample += line
+                if len(sample) >= 4096:
+                    break
+            handle.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            for row_idx, row in enumerate(csv.reader(handle, dialect), start=1):
+                if row_idx >= min_row:
+                    yield tuple(value.strip() or None for value in row)
+
+
+class ParquetSheet:
+    """Adapta un fichero Parquet a ``iter_rows`` leyendo por lotes con pyarrow.
+
+    La primera fila son los nombres de columna, igual que la cabecera de una
+    hoja o de un CSV.
+    """
+
+    BATCH_ROWS = 65536
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def iter_rows(self, min_row=1, values_only=True):
+        try:
+            parquet = lazy_import("pyarrow.parquet")
+        except ModuleNotFoundError as exc:
+            raise ModuleNotFoundError(
+                f"pyarrow no esta instalado; no se puede leer {self.path.name}."
+            ) from exc
+        source = parquet.ParquetFile(self.path)
+        if min_row <= 1:
+            yield tuple(source.schema_arrow.names)
+        row_idx = 1
+        for batch in source.iter_batches(batch_size=self.BATCH_ROWS):
+            columns = [column.to_pylist() for column in batch.columns]
+            for row in zip(*columns):
+                row_idx += 1
+                if row_idx >= min_row:
+                    yield row
+
+
+TABLE_SOURCES = {
+    ".csv": CsvSheet,
+    ".tsv": CsvSheet,
+    ".txt": CsvSheet,
+    ".parquet": ParquetSheet,
+}
+
+
+def table_files(directory):
+    return sorted(
+        path
+        for path in Path(directory).iterdir()
+        if path.suffix.lower() in TABLE_SOURCES
+    )
+
+
+def read_table_file(path, reader, cache=None):
+    path = Path(path)
+    source = TABLE_SOURCES.get(path.suffix.lower())
+    if source is None:
+        raise ValueError(f"Formato de tabla no soportado: {path.name}")
+    key = None
+    if cache is not None:
+        digest = hashlib.sha256(path.read_bytes()).digest()
+        key = cache.key(reader.__name__, path.name, digest)
+        data = cache.load(key)
+        if data is not None:
+            return data
+    with INSTRUMENTS.phase(reader.__name__):
+        data = reader(source(path))
+    if key is not None:
+        cache.store(key, data)
+    return data
+
+
+class PlayerMatcher:
+    """Indice de claves normalizadas de una hoja de clasificacion.
+
+    Resuelve cada jugador con las mismas reglas que la busqueda lineal
+    original (clave exacta y, si no, la coincidencia por subcadena mas
+    corta) y, como ultimo recurso, por prefijos de token igual que
+    ``Match-Team`` en ``equipos_etapa1_2026.ps1``. Los candidatos salen de
+    listas de n-gramas y tokens, sin recorrer todas las claves.
+    """
+
+    def __init__(self, scores, ngram=3, registry=None):
+        self.scores = scores
+        self.ngram = ngram
+        self.registry = registry
+        self.ambiguous = {}
+        self._ambiguous_keys = {}
+        self.unmapped = {}
+        self._order = {key: idx for idx, key in enumerate(scores)}
+        self._lengths = sorted({len(key) for key in scores})
+        self._grams = defaultdict(set)
+        self._token_keys = defaultdict(set)
+        self._resolved = {}
+        for key in scores:
+            for size in range(1, ngram + 1):
+                for gram in self._grams_of(key, size):
+                    self._grams[gram].add(key)
+            for token in key.split():
+                self._token_keys[token].add(key)
+        self._tokens = sorted(self._token_keys)
+
+    def add_keys(self, keys):
+        """Indexa claves nuevas de ``scores`` sin reconstruir el indice.
+
+        Las resoluciones aproximadas anteriores se descartan: una clave nueva
+        puede ser mejor candidata que la elegida antes.
+        """
+        for key in keys:
+            self._order[key] = len(self._order)
+            idx = bisect.bisect_left(self._lengths, len(key))
+            if idx == len(self._lengths) or self._lengths[idx] != len(key):
+                self._lengths.insert(idx, len(key))
+            for size in range(1, self.ngram + 1):
+                for gram in self._grams_of(key, size):
+                    self._grams[gram].add(key)
+            for token in key.split():
+                if token not in self._token_keys:
+                    bisect.insort(self._tokens, token)
+                self._token_keys[token].add(key)
+        self._resolved.clear()
+        self.ambiguous.clear()
+        self._ambiguous_keys.clear()
+        self.unmapped.clear()
+
+    @staticmethod
+    def _grams_of(text, size):
+        return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+    def is_indexed(self, key):
+        """La clave ya esta en el indice, aunque su puntuacion haya cambiado."""
+        return key in self._order
+
+    def approximate_count(self):
+        """Claves resueltas por subcadena o prefijo (sin coincidencia exacta)."""
+        return len(self._resolved)
+
+    def is_ambiguous(self, key):
+        """La clave tuvo varios candidatos, sea cual sea el jugador que la pidio."""
+        return key in self._ambiguous_keys
+
+    def player_key(self, player):
+        if self.registry is not None:
+            key = self.registry.keys.get(player)
+            if key is not None:
+                return key
+        return normalize_name(player)
+
+    def match(self, player):
+        return self.match_key(self.player_key(player), player)
+
+    def match_key(self, key, player):
+        resolved = self.resolve_key(key, player)
+        return self.scores[resolved] if resolved is not None else None
+
+    def resolve_key(self, key, player):
+        if not key:
+            return None
+        if key in self.scores:
+            return key
+        if self.registry is not None:
+            for alias in self.registry.aliases.get(key, ()):
+                if alias in self.scores:
+                    return alias
+        if key not in self._resolved:
+            self._resolved[key] = self._resolve(key)
+        # Cada jugador con esta clave entra en el informe, no solo el primero.
+        resolved = self._resolved[key]
+        if resolved is None:
+            self.unmapped[player] = key
+        elif key in self._ambiguous_keys:
+            self.ambiguous[player] = self._ambiguous_keys[key]
+        return resolved
+
+    def _resolve(self, key):
+        candidates = self._substring_candidates(key)
+        if candidates:
+            candidates.sort(key=lambda k: (len(k), self._order[k]))
+        else:
+            candidates = self._prefix_candidates(key)
+            candidates.sort(key=lambda k: (len(k.split()), len(k), self._order[k]))
+        if not candidates:
+            return None
+        if len(candidates) > 1:
+            self._ambiguous_keys[key] = [self.scores[k][0] for k in candidates]
+        return candidates[0]
+
+    def _substring_candidates(self, key):
+        found = set()
+        for size in self._lengths:
+            if size > len(key):
+                break
+            for start in range(len(key) - size + 1):
+                part = key[start : start + size]
+                if part in self.scores:
+                    found.add(part)
+        size = min(self.ngram, len(key))
+        postings = sorted(
+            (self._grams.get(gram, set()) for gram in self._grams_of(key, size)),
+            key=len,
+        )
+        if postings and postings[0]:
+            contained = set.intersection(*postings)
+            found.update(k for k in contained if key in k)
+        return list(found)
+
+    def _prefix_candidates(self, key):
+        result = None
+        for token in key.split():
+            keys = set()
+            idx = bisect.bisect_left(self._tokens, token)
+            while idx < len(self._tokens) and self._tokens[idx].startswith(token):
+                keys |= self._token_keys[self._tokens[idx]]
+                idx += 1
+            result = keys if result is None else result & keys
+            if not result:
+                return []
+        return list(result or [])
+
+
+def find_score(player, matcher):
+    return matcher.match(player)
+
+
+class PlayerRegistry:
+    """Registro SQLite de jugadores, plantillas y alias confirmados.
+
+    Cada jugador tiene un id canonico y su clave normalizada precalculada;
+    los alias son claves de hojas de clasificacion que ya se resolvieron sin
+    ambiguedad para ese jugador, de modo que en la siguiente prueba se
+    encuentran con una busqueda en diccionario en lugar de por aproximacion.
+    Las claves se recalculan si cambia ``NORMALIZER_VERSION``.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            key TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS aliases (
+            alias TEXT NOT NULL,
+            player_id INTEGER NOT NULL REFERENCES players(id),
+            PRIMARY KEY (alias, player_id)
+        );
+        CREATE TABLE IF NOT EXISTS rosters (
+            team TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            player_id INTEGER NOT NULL REFERENCES players(id),
+            PRIMARY KEY (team, position)
+        );
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.executescript(self.SCHEMA)
+        self.ids = {}
+        self.keys = {}
+        self.aliases = {}
+        with self._db:
+            self._check_version()
+        self._load()
+
+    def _check_version(self):
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE name = 'normalizer'"
+        ).fetchone()
+        if row is not None and row[0] == str(NORMALIZER_VERSION):
+            return
+        players = self._db.execute("SELECT id, name FROM players").fetchall()
+        self._db.executemany(
+            "UPDATE players SET key = ? WHERE id = ?",
+            [(normalize_name(name), player_id) for player_id, name in players],
+        )
+        self._db.execute("DELETE FROM aliases")
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('normalizer', ?)",
+            (str(NORMALIZER_VERSION),),
+        )
+
+    def _load(self):
+        keys_by_id = {}
+        for player_id, name, key in self._db.execute(
+            "SELECT id, name, key FROM players"
+        ):
+            self.ids[name] = player_id
+            self.keys[name] = key
+            keys_by_id[player_id] = key
+        aliases = defaultdict(list)
+        for alias, player_id in self._db.execute(
+            "SELECT alias, player_id FROM aliases ORDER BY rowid"
+        ):
+            aliases[keys_by_id[player_id]].append(alias)
+        self.aliases = {key: tuple(values) for key, values in aliases.items()}
+
+    def sync_teams(self, teams):
+        """Da de alta a los jugadores nuevos y guarda las plantillas actuales."""
+        with self._db:
+            for players in teams.values():
+                for player in players:
+                    if player not in self.ids:
+                        key = normalize_name(player)
+                        cursor = self._db.execute(
+                            "INSERT INTO players (name, key) VALUES (?, ?)",
+                            (player, key),
+                        )
+                        self.ids[player] = cursor.lastrowid
+                        self.keys[player] = key
+            self._db.execute("DELETE FROM rosters")
+            self._db.executemany(
+                "INSERT INTO rosters VALUES (?, ?, ?)",
+                [
+                    (team, position, self.ids[player])
+                    for team, players in teams.items()
+                    for position, player in enumerate(players)
+                ],
+            )
+
+    def teams(self):
+        teams = {}
+        for team, name in self._db.execute(
+            "SELECT team, name FROM rosters JOIN players ON players.id = player_id "
+            "ORDER BY rosters.rowid"
+        ):
+            teams.setdefault(team, []).append(name)
+        return teams
+
+    def learn(self, stages):
+        """Guarda como alias las coincidencias aproximadas sin ambiguedad."""
+        found = set()
+        for stage in stages:
+            matcher = stage.matcher
+            for aggregate in stage.aggregates:
+                for player, key, source in zip(
+                    aggregate.players, aggregate.keys, aggregate.sources
+                ):
+                    if (
+                        source is not None
+                        and source != key
+                        and not matcher.is_ambiguous(key)
+                        and player in self.ids
+                        and source not in self.aliases.get(key, ())
+                    ):
+                        found.add((source, self.ids[player], key))
+        if not found:
+            return 0
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO aliases VALUES (?, ?)",
+                [(alias, player_id) for alias, player_id, _ in found],
+            )
+        for alias, _, key in sorted(found):
+            self.aliases[key] = self.aliases.get(key, ()) + (alias,)
+        return len(found)
+
+    def close(self):
+        self._db.close()
+
+
+def report_matching(stages, output_path=None):
+    lines = []
+    for stage in stages:
+        matcher = stage.matcher
+        if matcher.ambiguous:
+            print(
+                f"{stage.name}: jugadores con coincidencia ambigua: "
+                f"{len(matcher.ambiguous)}"
+            )
+        for player, candidates in matcher.ambiguous.items():
+            lines.append(f"{stage.name}\tAMBIGUO\t{player}\t{' | '.join(candidates)}")
+        for player in matcher.unmapped:
+            lines.append(f"{stage.name}\tSIN PUNTUACION\t{player}")
+    if output_path:
+        Path(output_path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+MISSING_STROKES = 180
+TEAM_SCORING_PLAYERS = 4
+TIEBREAK_DEPTH = 10
+
+
+class TeamAggregate:
+    """Resultado de un equipo en una etapa, con cada jugador resuelto una vez."""
+
+    __slots__ = (
+        "team",
+        "players",
+        "keys",
+        "sources",
+        "matches",
+        "found",
+        "strokes",
+        "top4",
+        "total",
+        "tiebreak",
+    )
+
+    def __init__(self, team, players, keys, sources, scores):
+        self.team = team
+        self.players = players
+        self.keys = keys
+        self.sources = sources
+        matches = [scores[source] if source is not None else None for source in sources]
+        self.matches = matches
+        self.found = sorted(
+            (idx for idx, match in enumerate(matches) if match is not None),
+            key=lambda idx: matches[idx][1],
+        )
+        self.strokes = [matches[idx][1] for idx in self.found]
+        scoring = self.found[:TEAM_SCORING_PLAYERS]
+        self.top4 = {keys[idx] for idx in scoring}
+        counted = self.strokes[:TEAM_SCORING_PLAYERS]
+        missing_players = TEAM_SCORING_PLAYERS - len(counted)
+        self.total = sum(counted) + MISSING_STROKES * missing_players
+        tail = self.strokes[TEAM_SCORING_PLAYERS:TIEBREAK_DEPTH]
+        missing = TIEBREAK_DEPTH - TEAM_SCORING_PLAYERS - len(tail)
+        self.tiebreak = tuple(tail + [MISSING_STROKES] * missing)
+
+    @property
+    def scoring_matches(self):
+        return [self.matches[idx] for idx in self.found[:TEAM_SCORING_PLAYERS]]
+
+
+def aggregate_team(team, players, matcher):
+    # Jugadores de plantilla buscados, tambien al recalcular un solo equipo.
+    if INSTRUMENTS.enabled:
+        INSTRUMENTS.count("find_score jugadores", len(players))
+    keys = [matcher.player_key(player) for player in players]
+    sources = [matcher.resolve_key(key, player) for key, player in zip(keys, players)]
+    return TeamAggregate(team, players, keys, sources, matcher.scores)
+
+
+def aggregate_teams(teams, matcher):
+    return [aggregate_team(team, players, matcher) for team, players in teams.items()]
+
+
+NUMPY_MIN_CELLS = 1000
+
+
+def rank_aggregates(aggregates):
+    return sorted(
+        range(len(aggregates)),
+        key=lambda idx: (aggregates[idx].total, aggregates[idx].tiebreak),
+    )
+
+
+def pack_strokes(np, stage_aggregates):
+    team_count = len(stage_aggregates[0])
+    roster = max(
+        [TIEBREAK_DEPTH]
+        + [
+            len(aggregate.players)
+            for aggregates in stage_aggregates
+            for aggregate in aggregates
+        ]
+    )
+    # Los huecos valen mas que cualquier golpe real: se eligen los mejores
+    # golpes reales y solo despues se penaliza, como en ``TeamAggregate``.
+    strokes = np.full(
+        (team_count, roster, len(stage_aggregates)),
+        np.iinfo(np.int64).max,
+        dtype=np.int64,
+    )
+    for stage_idx, aggregates in enumerate(stage_aggregates):
+        for team_idx, aggregate in enumerate(aggregates):
+            for player_idx, match in enumerate(aggregate.matches):
+                if match is not None:
+                    strokes[team_idx, player_idx, stage_idx] = match[1]
+    return strokes
+
+
+def score_strokes(np, strokes):
+    """Totales, desempates y orden de todas las etapas a la vez.
+
+    ``strokes`` es un array equipo x jugador x etapa con el maximo del tipo
+    en los huecos. Devuelve los totales (equipo x etapa), los desempates
+    (equipo x 6 x etapa) y el orden de equipos de cada etapa (etapa x equipo).
+    """
+    best = np.partition(strokes, TIEBREAK_DEPTH - 1, axis=1)[:, :TIEBREAK_DEPTH, :]
+    best.sort(axis=1)
+    best[best == np.iinfo(best.dtype).max] = MISSING_STROKES
+    totals = best[:, :TEAM_SCORING_PLAYERS, :].sum(axis=1)
+    tiebreak = best[:, TEAM_SCORING_PLAYERS:, :]
+    keys = [tiebreak[:, idx, :].T for idx in reversed(range(tiebreak.shape[1]))]
+    orders = np.lexsort(keys + [totals.T], axis=-1)
+    return totals, tiebreak, orders
+
+
+def rank_stage_aggregates(stage_aggregates):
+    if not stage_aggregates or not stage_aggregates[0]:
+        return [[] for _ in stage_aggregates]
+    if len(stage_aggregates) * len(stage_aggregates[0]) >= NUMPY_MIN_CELLS:
+        try:
+            np = lazy_import("numpy")
+        except ModuleNotFoundError:
+            np = None
+        if np is not None:
+            _, _, orders = score_strokes(np, pack_strokes(np, stage_aggregates))
+            return orders.tolist()
+    return [rank_aggregates(aggregates) for aggregates in stage_aggregates]
+
+
+HOLES = 18
+NO_HOLE = 32767
+_HOLE_HEADER_RE = re.compile(r"^(?:h|hoyo|hole)\s*0*(\d{1,2})$", re.IGNORECASE)
+
+
+def read_scorecards(ws):
+    """Tarjetas hoyo a hoyo: una fila por tarjeta, columnas ``H1``..``H18``.
+
+    El jugador va en la columna ``Jugador`` (o la segunda, como en las hojas
+    de clasificacion). Devuelve ``{clave: (nombre, golpes)}`` con las tarjetas
+    de cada jugador seguidas en un ``array('h')`` de 18 en 18 y ``NO_HOLE`` en
+    los hoyos sin dato.
+    """
+    rows = ws.iter_rows(values_only=True)
+    header = [str(value or "").strip() for value in next(rows, ())]
+    holes = {}
+    name_col = 1
+    for col_idx, title in enumerate(header):
+        match = _HOLE_HEADER_RE.match(title)
+        if match and 1 <= int(match.group(1)) <= HOLES:
+            holes[int(match.group(1)) - 1] = col_idx
+        elif title.lower() in ("jugador", "nombre", "player"):
+            name_col = col_idx
+    if not holes:
+        raise ValueError("La hoja de tarjetas no tiene columnas de hoyos (H1..H18).")
+    columns = [holes.get(hole) for hole in range(HOLES)]
+    cards = {}
+    for row in rows:
+        name = row[name_col] if len(row) > name_col else None
+        if not name:
+            continue
+        card = []
+        for col_idx in columns:
+            value = row[col_idx] if col_idx is not None and col_idx < len(row) else None
+            try:
+                strokes = int(value)
+            except (TypeError, ValueError):
+                strokes = NO_HOLE
+            card.append(strokes if 0 < strokes < NO_HOLE else NO_HOLE)
+        if card.count(NO_HOLE) == HOLES:
+            continue
+        key = normalize_name(str(name))
+        if key:
+            cards.setdefault(key, (str(name).strip(), array("h")))[1].extend(card)
+    return cards
+
+
+def merge_scorecards(sources):
+    merged = {}
+    for cards in sources:
+        for key, (name, player_cards) in cards.items():
+            merged.setdefault(key, (name, array("h")))[1].extend(player_cards)
+    return merged
+
+
+class CupTable:
+    """Tarjeta de la Copa (``best_hole_cup``) de cada jugador.
+
+    ``best`` guarda, por jugador, el mejor resultado de cada hoyo entre todas
+    sus tarjetas; ``totals`` es la suma de esos 18 hoyos o ``None`` si algun
+    hoyo no se ha jugado nunca.
+    """
+
+    __slots__ = ("keys", "names", "cards", "best", "totals")
+
+    def __init__(self, keys, names, cards, best, totals):
+        self.keys = keys
+        self.names = names
+        self.cards = cards
+        self.best = best
+        self.totals = totals
+
+    def order(self):
+        return sorted(
+            range(len(self.keys)),
+            key=lambda idx: (self.totals[idx] is None, self.totals[idx] or 0, idx),
+        )
+
+    def scores(self):
+        """Totales completos con el formato de ``read_scores``."""
+        return {
+            key: (name, total)
+            for key, name, total in zip(self.keys, self.names, self.totals)
+            if total is not None
+        }
+
+
+def best_hole_cup(scorecards):
+    keys = list(scorecards)
+    names = [scorecards[key][0] for key in keys]
+    counts = [len(scorecards[key][1]) // HOLES for key in keys]
+    np = None
+    if sum(counts) * HOLES >= NUMPY_MIN_CELLS:
+        try:
+            np = lazy_import("numpy")
+        except ModuleNotFoundError:
+            np = None
+    if np is None:
+        best = []
+        for key in keys:
+            strokes = scorecards[key][1]
+            row = [min(strokes[hole::HOLES]) for hole in range(HOLES)]
+            best.append([None if v == NO_HOLE else v for v in row])
+        totals = [None if None in row else sum(row) for row in best]
+        return CupTable(keys, names, counts, best, totals)
+
+    # Jugador x tarjeta x hoyo; los huecos valen NO_HOLE y no ganan el minimo.
+    flat = np.frombuffer(
+        b"".join(scorecards[key][1].tobytes() for key in keys), dtype=np.int16
+    ).reshape(-1, HOLES)
+    sizes = np.array(counts, dtype=np.intp)
+    players = np.repeat(np.arange(len(keys)), sizes)
+    slots = np.arange(len(players)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    cards = np.full(
+        (len(keys), int(sizes.max(initial=0)), HOLES), NO_HOLE, dtype=np.int16
+    )
+    cards[players, slots] = flat
+    best = cards.min(axis=1)
+    complete = (best != NO_HOLE).all(axis=1)
+    sums = best.sum(axis=1, dtype=np.int32)
+    totals = [int(total) if ok else None for total, ok in zip(sums, complete)]
+    best = [[None if v == NO_HOLE else v for v in row] for row in best.tolist()]
+    return CupTable(keys, names, counts, best, totals)
+
+
+def build_cup_csv(table, output_path):
+    with atomic_output(output_path) as tmp_path:
+        with open(tmp_path, "w", newline="", encoding="utf-8-sig") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(
+                ["Posicion", "Jugador"]
+                + [f"H{hole}" for hole in range(1, HOLES + 1)]
+                + ["Total", "Tarjetas"]
+            )
+            for position, idx in enumerate(table.order(), start=1):
+                writer.writerow(
+                    [position, table.names[idx]]
+                    + ["" if v is None else v for v in table.best[idx]]
+                    + ["" if table.totals[idx] is None else table.totals[idx]]
+                    + [table.cards[idx]]
+                )
+    return str(output_path)
+
+
+class BestCardBoard:
+    """Clasificacion ``best_card`` (Semanal): cuenta la tarjeta mas baja.
+
+    Cada jugador entrega como mucho ``max_cards`` tarjetas (``numberOfRounds``);
+    las que pasan del limite se cuentan en ``rejected`` y no puntuan.
+    """
+
+    __slots__ = ("max_cards", "scores", "cards", "rejected")
+
+    def __init__(self, max_cards=None):
+        self.max_cards = max_cards
+        self.scores = {}
+        self.cards = {}
+        self.rejected = 0
+
+    def add(self, name, strokes):
+        """Apunta una tarjeta; devuelve la clave si mejora la del jugador."""
+        key = normalize_name(str(name))
+        if not key:
+            return None
+        count = self.cards.get(key, 0)
+        if self.max_cards is not None and count >= self.max_cards:
+            self.rejected += 1
+            return None
+        self.cards[key] = count + 1
+        best = self.scores.get(key)
+        if best is None:
+            self.scores[key] = (str(name).strip(), strokes)
+            return key
+        if strokes < best[1]:
+            self.scores[key] = (best[0], strokes)
+            return key
         return None
-    if key in scores:
-        return scores[key]
-    matches = [k for k in score_keys if k in key or key in k]
-    if matches:
-        matches.sort(key=len)
-        return scores[matches[0]]
-    return None
-
-
-def compute_results(teams, scores):
-    score_keys = list(scores.keys())
-    results = []
-    for team, players in teams.items():
-        found = []
-        for player in players:
-            match = find_score(player, scores, score_keys)
-            if match is not None:
-                found.append((match[0], match[1]))
-        found.sort(key=lambda item: item[1])
-        top4 = found[:4]
-        total = sum(score for _, score in top4)
-        results.append(
-            {
-                "Equipo": team,
-                "TotalGolpes": total,
-                "JugadoresPuntuaron": ", ".join(name for name, _ in top4),
-                "GolpesPuntuaron": ", ".join(str(score) for _, score in top4),
-            }
+
+
+class CardLog:
+    """Registro CSV de tarjetas de la semana que solo crece.
+
+    Cada ``poll`` lee unicamente lo anadido desde el byte de la ultima linea
+    completa. Si el fichero se trunca o cambian la cabecera o los ultimos
+    bytes ya leidos, se empieza de cero. Un Excel se reescribe entero en cada
+    guardado y no se puede leer por incrementos, asi que no se admite.
+    Las columnas salen de la cabecera (``Jugador`` y ``Golpes``, o ``H1``..
+    ``H18`` sumados); sin ellas, segunda y tercera columna como en
+    ``read_scores``.
+    """
+
+    SUFFIXES = (".csv", ".tsv", ".txt")
+    TAIL_BYTES = 4096
+
+    def __init__(self, path, max_cards=None):
+        self.path = Path(path)
+        if self.path.suffix.lower() not in self.SUFFIXES:
+            raise ValueError(
+                f"El registro semanal {self.path.name} debe ser CSV: un Excel no "
+                "se puede leer por incrementos; exporta las tarjetas a CSV."
+            )
+        self.max_cards = max_cards
+        self.reset()
+
+    def reset(self):
+        self.board = BestCardBoard(self.max_cards)
+        self.offset = 0
+        self.header = b""
+        self.tail = b""
+        self.dialect = csv.excel
+        self.columns = None
+        self.touched = []
+
+    @property
+    def scores(self):
+        return self.board.scores
+
+    def poll(self):
+        """Procesa las tarjetas nuevas y devuelve, en orden, las claves que mejoran."""
+        rows = self._new_rows()
+        changed = {}
+        for row in rows:
+            if self.columns is None:
+                self.columns = self._columns(row)
+                continue
+            card = self._card(row)
+            if card is not None:
+                key = self.board.add(*card)
+                if key is not None:
+                    changed[key] = None
+        self.touched = list(changed)
+        return self.touched
+
+    def _new_rows(self):
+        size = self.path.stat().st_size
+        with self.path.open("rb") as handle:
+            if self.offset and not self._unchanged(handle, size):
+                self.reset()
+            handle.seek(self.offset)
+            data = handle.read()
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return []
+        start = self.offset
+        self.offset += end
+        self.tail = (self.tail + data[:end])[-self.TAIL_BYTES :]
+        text = data[:end].decode("utf-8-sig" if start == 0 else "utf-8")
+        if start == 0:
+            self.header = data[: data.find(b"\n") + 1]
+            try:
+                self.dialect = csv.Sniffer().sniff(
+                    text.partition("\n")[0], delimiters=",;\t"
+                )
+            except csv.Error:
+                self.dialect = csv.excel
+        return (
+            tuple(value.strip() or None for value in row)
+            for row in csv.reader(io.StringIO(text, newline=""), self.dialect)
         )
-    results.sort(key=lambda item: item["TotalGolpes"])
-    return results
-
-
-def compute_team_points(results, stage_count):
-    points_table = [
-        100,
-        96,
-        92,
-        88,
-        84,
-        80,
-        77,
-        74,
-        71,
-        69,
-        67,
-        65,
-        63,
-        61,
-        59,
-        57,
-        55,
-        53,
-        51,
-        49,
-    ]
-    rows = []
-    for idx, item in enumerate(results):
-        stage_points = [0] * stage_count
-        if idx < len(points_table):
-            stage_points[0] = points_table[idx]
-        rows.append(
-            {
-                "Equipo": item["Equipo"],
-                "Etapas": stage_points,
-                "Total": sum(stage_points),
+
+    def _unchanged(self, handle, size):
+        """Cabecera y ultimos bytes leidos siguen igual (sin releer el resto)."""
+        if size < self.offset or handle.read(len(self.header)) != self.header:
+            return False
+        handle.seek(self.offset - len(self.tail))
+        return handle.read(len(self.tail)) == self.tail
+
+    @staticmethod
+    def _columns(header):
+        name_col, strokes_col, holes = 1, None, {}
+        for col_idx, value in enumerate(header):
+            title = str(value or "").strip()
+            match = _HOLE_HEADER_RE.match(title)
+            if match and 1 <= int(match.group(1)) <= HOLES:
+                holes[int(match.group(1)) - 1] = col_idx
+            elif title.lower() in ("jugador", "nombre", "player"):
+                name_col = col_idx
+            elif title.lower() in ("golpes", "total", "strokes"):
+                strokes_col = col_idx
+        if strokes_col is None and len(holes) == HOLES:
+            return name_col, None, [holes[hole] for hole in range(HOLES)]
+        return name_col, 2 if strokes_col is None else strokes_col, None
+
+    def _card(self, row):
+        name_col, strokes_col, holes = self.columns
+        name = row[name_col] if len(row) > name_col else None
+        if not name:
+            return None
+        try:
+            if holes is None:
+                strokes = int(row[strokes_col])
+            else:
+                strokes = sum(int(row[col_idx]) for col_idx in holes)
+        except (IndexError, TypeError, ValueError):
+            return None
+        return name, strokes
+
+
+POINTS_TABLE = [
+    100,
+    96,
+    92,
+    88,
+    84,
+    80,
+    77,
+    74,
+    71,
+    69,
+    67,
+    65,
+    63,
+    61,
+    59,
+    57,
+    55,
+    53,
+    51,
+    49,
+]
+
+
+class StageResult:
+    __slots__ = ("name", "matcher", "aggregates", "order", "points")
+
+    def __init__(self, name, matcher, aggregates, order, points):
+        self.name = name
+        self.matcher = matcher
+        self.aggregates = aggregates
+        self.order = order
+        self.points = points
+
+
+def compute_stage_points(order, points_table=POINTS_TABLE):
+    points = [0] * len(order)
+    for position, team_idx in enumerate(order[: len(points_table)]):
+        points[team_idx] = points_table[position]
+    return points
+
+
+class SeasonEngine:
+    """Acumula etapas de una temporada sobre una misma plantilla de equipos.
+
+    Cada llamada a ``add_stage`` resuelve y puntua solo la etapa nueva; las
+    anteriores se conservan tal cual, de modo que las tablas de temporada se
+    recomponen a partir de resultados ya calculados.
+    """
+
+    def __init__(
+        self, teams, points_table=POINTS_TABLE, best_stages=None, registry=None
+    ):
+        self.teams = teams
+        self.points_table = points_table
+        self.best_stages = best_stages
+        self.registry = registry
+        self.stages = []
+
+    def add_stage(self, name, scores):
+        return self.add_stages([(name, scores)])[0]
+
+    def add_stages(self, named_scores):
+        pending = []
+        with INSTRUMENTS.phase("find_score"):
+            for name, scores in named_scores:
+                matcher = PlayerMatcher(scores, registry=self.registry)
+                pending.append((name, matcher, aggregate_teams(self.teams, matcher)))
+                INSTRUMENTS.count("find_score aproximadas", matcher.approximate_count())
+        with INSTRUMENTS.phase("compute_results"):
+            orders = rank_stage_aggregates([item[2] for item in pending])
+        added = [
+            self._stage_result(name, matcher, aggregates, order)
+            for (name, matcher, aggregates), order in zip(pending, orders)
+        ]
+        self.stages.extend(added)
+        return added
+
+    def _stage_result(self, name, matcher, aggregates, order):
+        points = compute_stage_points(order, self.points_table)
+        return StageResult(name, matcher, aggregates, order, points)
+
+    def update_stage(self, idx, scores, touched_keys=None):
+        """Recalcula los equipos afectados por los cambios de una etapa.
+
+        ``touched_keys`` evita comparar las dos clasificaciones enteras cuando
+        quien llama ya sabe que claves han cambiado (el registro semanal).
+        """
+        stage = self.stages[idx]
+        previous = stage.matcher.scores
+        if touched_keys is None:
+            removed = previous.keys() - scores.keys()
+            added = scores.keys() - previous.keys()
+            changed = {
+                key
+                for key in scores.keys() & previous.keys()
+                if scores[key] != previous[key]
             }
+        else:
+            removed = set()
+            added = [key for key in touched_keys if not stage.matcher.is_indexed(key)]
+            changed = set(touched_keys).difference(added)
+        if not (added or removed or changed):
+            return set()
+        if touched_keys is None:
+            rematch = list(previous) != list(scores)
+        else:
+            rematch = bool(added)
+        if rematch and touched_keys is None:
+            matcher = PlayerMatcher(scores, registry=self.registry)
+        else:
+            matcher = stage.matcher
+            matcher.scores = scores
+            if added:
+                matcher.add_keys(added)
+        touched = changed | removed
+        aggregates = list(stage.aggregates)
+        affected = set()
+        for team_idx, aggregate in enumerate(aggregates):
+            dirty = any(source in touched for source in aggregate.sources)
+            if not dirty and rematch:
+                dirty = any(
+                    key and source != key
+                    for key, source in zip(aggregate.keys, aggregate.sources)
+                )
+            if dirty:
+                aggregates[team_idx] = aggregate_team(
+                    aggregate.team, aggregate.players, matcher
+                )
+                affected.add(aggregate.team)
+        order = rank_stage_aggregates([aggregates])[0]
+        self.stages[idx] = self._stage_result(stage.name, matcher, aggregates, order)
+        return affected
+
+    @property
+    def latest(self):
+        return self.stages[-1] if self.stages else None
+
+    def model(self, stage_count):
+        return SeasonModel.from_engine(self, stage_count)
+
+
+def season_total(stage_points, best_stages=None):
+    if best_stages is None:
+        return sum(stage_points)
+    return sum(sorted(stage_points, reverse=True)[:best_stages])
+
+
+_STAGE_SHEET_RE = re.compile(r"^clasificaci[oó]n\s+etapa\s+(\d+)\b", re.IGNORECASE)
+
+
+def stage_label(name, number):
+    """Etiqueta de una etapa en las salidas.
+
+    Es el nombre de la etapa (``Copa``, ``Semanal``, el fichero de
+    ``--scores-dir``...); las hojas estandar ``Clasificacion etapa N 2026`` y
+    las etapas sin nombre se quedan en ``Etapa N``.
+    """
+    name = str(name or "").strip()
+    if not name:
+        return f"Etapa {number}"
+    match = _STAGE_SHEET_RE.match(name)
+    if match:
+        return f"Etapa {int(match.group(1))}"
+    return name
+
+
+class SeasonModel:
+    """Clasificacion de una temporada en arrays compactos.
+
+    Equipos y jugadores se identifican por indice: ``team_names`` y
+    ``player_names`` son las tablas de nombres internados y ``roster``
+    guarda, equipo tras equipo, los ids de jugador de cada plantilla
+    (``roster_offsets`` marca donde empieza cada equipo). Los golpes viven en
+    una matriz ``int32`` jugador x etapa con ``MISSING_STROKES`` para quien
+    no puntuo; las casillas que suman para el equipo estan en ``scored``
+    (hueco de plantilla x etapa). Todas las salidas leen de aqui.
+    """
+
+    __slots__ = (
+        "stage_names",
+        "played",
+        "team_names",
+        "roster_offsets",
+        "roster",
+        "player_names",
+        "strokes",
+        "sheet_names",
+        "sheet_name_ids",
+        "scored",
+        "scorer_slots",
+        "team_totals",
+        "stage_orders",
+        "stage_points",
+        "season_totals",
+        "season_order",
+    )
+
+    def __init__(
+        self, stage_names, played, team_names, roster_offsets, roster, player_names
+    ):
+        team_count = len(team_names)
+        slots = len(roster)
+        self.stage_names = stage_names
+        self.played = played
+        self.team_names = team_names
+        self.roster_offsets = roster_offsets
+        self.roster = roster
+        self.player_names = player_names
+        self.strokes = array("i", [MISSING_STROKES]) * (len(player_names) * played)
+        self.sheet_names = []
+        self.sheet_name_ids = array("i", [-1]) * (len(player_names) * played)
+        self.scored = bytearray(slots * played)
+        self.scorer_slots = array("i", [-1]) * (
+            team_count * played * TEAM_SCORING_PLAYERS
         )
-    return rows
+        self.team_totals = array("i", [0]) * (team_count * played)
+        self.stage_orders = array("i", [0]) * (played * team_count)
+        self.stage_points = array("h", [0]) * (team_count * played)
+        self.season_totals = array("i", [0]) * team_count
+        self.season_order = array("i", range(team_count))
 
+    @classmethod
+    def from_engine(cls, engine, stage_count):
+        stages = engine.stages
+        played = len(stages)
+        width = max(stage_count, played)
+        stage_names = [
+            stage_label(stages[idx].name if idx < played else "", idx + 1)
+            for idx in range(width)
+        ]
+        team_names = list(engine.teams)
+        player_ids = {}
+        player_names = []
+        roster = array("i")
+        roster_offsets = array("i", [0])
+        for players in engine.teams.values():
+            for player in players:
+                player_id = player_ids.get(player)
+                if player_id is None:
+                    player_id = player_ids[player] = len(player_names)
+                    player_names.append(player)
+                roster.append(player_id)
+            roster_offsets.append(len(roster))
+        model = cls(
+            stage_names, played, team_names, roster_offsets, roster, player_names
+        )
 
-def build_player_groups(teams, scores, stage_count):
-    score_keys = list(scores.keys())
-    groups = []
-    for team, players in teams.items():
-        found = []
-        for player in players:
-            match = find_score(player, scores, score_keys)
-            if match is not None:
-                found.append((player, match[0], match[1]))
-        found.sort(key=lambda item: item[2])
-        top4 = {normalize_name(item[0]) for item in found[:4]}
+        strokes = model.strokes
+        sheet_name_ids = model.sheet_name_ids
+        sheet_names = model.sheet_names
+        scored = model.scored
+        scorer_slots = model.scorer_slots
+        sheet_ids = {}
+        for stage_idx, stage in enumerate(stages):
+            for team_idx, aggregate in enumerate(stage.aggregates):
+                first_slot = roster_offsets[team_idx]
+                cell = team_idx * played + stage_idx
+                keys = aggregate.keys
+                top4 = aggregate.top4
+                for offset in aggregate.found:
+                    name, value = aggregate.matches[offset]
+                    slot = first_slot + offset
+                    player_cell = roster[slot] * played + stage_idx
+                    strokes[player_cell] = value
+                    sheet_id = sheet_ids.get(name)
+                    if sheet_id is None:
+                        sheet_id = sheet_ids[name] = len(sheet_names)
+                        sheet_names.append(name)
+                    sheet_name_ids[player_cell] = sheet_id
+                    if keys[offset] in top4:
+                        scored[slot * played + stage_idx] = 1
+                first = cell * TEAM_SCORING_PLAYERS
+                for rank, offset in enumerate(aggregate.found[:TEAM_SCORING_PLAYERS]):
+                    scorer_slots[first + rank] = first_slot + offset
+                model.team_totals[cell] = aggregate.total
+                model.stage_points[cell] = stage.points[team_idx]
+            first = stage_idx * len(team_names)
+            model.stage_orders[first : first + len(stage.order)] = array(
+                "i", stage.order
+            )
 
-        rows = []
-        for player in players:
-            match = find_score(player, scores, score_keys)
-            etapa_scores = [180] * stage_count
-            etapa_scored = [False] * stage_count
-            if match is not None:
-                etapa_scores[0] = match[1]
-                etapa_scored[0] = normalize_name(player) in top4
-            rows.append(
-                {
-                    "Jugador": player,
-                    "Etapas": etapa_scores,
-                    "Scored": etapa_scored,
-                }
+        for team_idx in range(len(team_names)):
+            model.season_totals[team_idx] = season_total(
+                model.stage_points[team_idx * played : (team_idx + 1) * played],
+                engine.best_stages,
             )
-        groups.append({"Equipo": team, "Rows": rows})
-    return groups
+        if played:
+            latest = model.ranking()
+            model.season_order = array(
+                "i", sorted(latest, key=lambda team: -model.season_totals[team])
+            )
+        return model
+
+    @property
+    def stage_label(self):
+        return self.stage_names[max(self.played, 1) - 1]
+
+    def ranking(self, stage_idx=None):
+        if stage_idx is None:
+            stage_idx = self.played - 1
+        team_count = len(self.team_names)
+        return self.stage_orders[stage_idx * team_count : (stage_idx + 1) * team_count]
+
+    def team_total(self, team_idx, stage_idx=None):
+        if stage_idx is None:
+            stage_idx = self.played - 1
+        return self.team_totals[team_idx * self.played + stage_idx]
+
+    def team_scorers(self, team_idx, stage_idx=None):
+        if stage_idx is None:
+            stage_idx = self.played - 1
+        start = (team_idx * self.played + stage_idx) * TEAM_SCORING_PLAYERS
+        scorers = []
+        for slot in self.scorer_slots[start : start + TEAM_SCORING_PLAYERS]:
+            if slot < 0:
+                break
+            cell = self.roster[slot] * self.played + stage_idx
+            name = self.sheet_names[self.sheet_name_ids[cell]]
+            scorers.append((name, self.strokes[cell]))
+        return scorers
+
+    def team_strokes(self, team_idx, stage_idx=None):
+        """Golpes ordenados de los jugadores del equipo que puntuaron."""
+        if stage_idx is None:
+            stage_idx = self.played - 1
+        strokes = []
+        for slot in self.team_slots(team_idx):
+            cell = self.roster[slot] * self.played + stage_idx
+            if self.sheet_name_ids[cell] >= 0:
+                strokes.append(self.strokes[cell])
+        return sorted(strokes)
+
+    def stage_cells(self, team_idx):
+        start = team_idx * self.played
+        cells = list(self.stage_points[start : start + self.played])
+        return cells + [""] * (len(self.stage_names) - self.played)
+
+    def team_slots(self, team_idx):
+        return range(self.roster_offsets[team_idx], self.roster_offsets[team_idx + 1])
+
+    def player_cells(self, slot):
+        """Golpes y casillas que puntuan de un hueco de plantilla, etapa a etapa."""
+        played = self.played
+        padding = len(self.stage_names) - played
+        start = self.roster[slot] * played
+        strokes = self.strokes[start : start + played].tolist() + [""] * padding
+        start = slot * played
+        return strokes, self.scored[start : start + played] + bytes(padding)
+
+    def player_name(self, slot):
+        return self.player_names[self.roster[slot]]
+
+
+FONT_TYPES = {".woff2": "font/woff2", ".woff": "font/woff", ".ttf": "font/ttf"}
+FONT_WEIGHTS = {"regular": 400, "medium": 500, "semibold": 600, "bold": 700}
+
+
+class AssetCache:
+    """Logo y fuentes de las salidas, calculados una vez por contenido.
+
+    Todo se indexa por el sha256 del fichero de origen: la codificacion en
+    base64, el logo reducido para el PDF y las reglas ``@font-face`` se
+    guardan en memoria y en ``cache_dir``, de modo que las siguientes
+    ejecuciones y los trabajos del modo lote los reutilizan.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._digests = {}
+        self._memory = {}
+
+    def digest(self, path):
+        path = Path(path)
+        stat = path.stat()
+        marker = (str(path), stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(marker)
+        if digest is None:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            self._digests[marker] = digest
+        return digest
+
+    def _cached(self, name, build):
+        if name in self._memory:
+            self.hits += 1
+            return self._memory[name]
+        path = self.cache_dir / name if self.cache_dir else None
+        if path is not None and path.exists():
+            self.hits += 1
+            data = path.read_bytes()
+        else:
+            self.misses += 1
+            data = build()
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+        self._memory[name] = data
+        return data
+
+    def data_uri(self, path, mime="image/png"):
+        if not path or not Path(path).exists():
+            return ""
+        path = Path(path)
+        encoded = self._cached(
+            f"{self.digest(path)}.b64", lambda: base64.b64encode(path.read_bytes())
+        )
+        return f"data:{mime};base64,{encoded.decode('ascii')}"
+
+    def resized_image(self, path, width, height):
+        """Copia del logo reducida a ``width`` x ``height`` pixeles (Pillow)."""
+        path = Path(path)
+        if self.cache_dir is None:
+            return path
+        try:
+            image_module = lazy_import("PIL.Image")
+        except ModuleNotFoundError:
+            return path
+        with image_module.open(path) as image:
+            if image.width <= width and image.height <= height:
+                return path
+
+            def build():
+                with image_module.open(path) as source:
+                    resized = source.resize((width, height), image_module.LANCZOS)
+                    buffer = io.BytesIO()
+                    resized.save(buffer, format="PNG", optimize=True)
+                    return buffer.getvalue()
+
+        name = f"{self.digest(path)}-{width}x{height}.png"
+        if len(self._cached(name, build)) >= path.stat().st_size:
+            return path
+        return self.cache_dir / name
+
+    def font_css(self, font_dir):
+        """Reglas ``@font-face`` con las fuentes locales incrustadas."""
+        font_dir = Path(font_dir)
+        fonts = []
+        if font_dir.is_dir():
+            fonts = sorted(
+                path for path in font_dir.iterdir() if path.suffix.lower() in FONT_TYPES
+            )
+        rules = []
+        for path in fonts:
+            family, _, weight = path.stem.partition("-")
+            weight = FONT_WEIGHTS.get(weight.lower(), weight or 400)
+            rules.append(
+                f"\n    @font-face {{ font-family: '{family.replace('_', ' ')}'; "
+                f"font-weight: {weight}; font-display: swap; "
+                f"src: url({self.data_uri(path, FONT_TYPES[path.suffix.lower()])}); }}"
+            )
+        return "".join(rules)
+
+    def publish(self, directory, name, data):
+        """Escribe ``data`` en ``directory`` con el hash en el nombre, una sola vez."""
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, dot, suffix = name.rpartition(".")
+        target = Path(directory) / f"{stem}-{digest}{dot}{suffix}"
+        if not target.exists():
+            tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, target)
+        return target.name
+
+
+ASSETS = AssetCache(CACHE_DIR / "assets")
+
 
 def build_logo_data_uri(path):
-    if not path or not path.exists():
-        return ""
-    data = path.read_bytes()
-    encoded = base64.b64encode(data).decode("ascii")
-    return f"data:image/png;base64,{encoded}"
-
-def write_clasificacion_sheet(wb, results, sheet_name="Clasificacion equipos"):
-    if sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        wb.remove(ws)
-    ws = wb.create_sheet(sheet_name)
-    ws.append(["Equipo", "TotalGolpes", "JugadoresPuntuaron", "GolpesPuntuaron"])
-    for item in results:
-        ws.append(
-            [
-                item["Equipo"],
-                item["TotalGolpes"],
-                item["JugadoresPuntuaron"],
-                item["GolpesPuntuaron"],
-            ]
+    return ASSETS.data_uri(path)
+
+CLASSIFICATION_SHEET = "Clasificacion equipos"
+SEASON_SHEET = "Temporada equipos"
+STAGE_SHEET_PREFIX = "Equipos "
+XLSX_WORKSHEET_REL = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+)
+XLSX_WORKSHEET_TYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+)
+
+
+def stage_result_rows(model, stage_idx=None):
+    yield ["Equipo", "TotalGolpes", "JugadoresPuntuaron", "GolpesPuntuaron"]
+    for team_idx in model.ranking(stage_idx):
+        scorers = model.team_scorers(team_idx, stage_idx)
+        yield [
+            model.team_names[team_idx],
+            model.team_total(team_idx, stage_idx),
+            ", ".join(name for name, _ in scorers),
+            ", ".join(str(strokes) for _, strokes in scorers),
+        ]
+
+
+def season_rows(model):
+    yield ["Equipo"] + model.stage_names + ["Total"]
+    for team_idx in model.season_order:
+        yield (
+            [model.team_names[team_idx]]
+            + model.stage_cells(team_idx)
+            + [model.season_totals[team_idx]]
         )
 
 
-def build_html(results, output_path, classification_rows, player_groups, stage_names, logo_path):
-    cards = []
-    for idx, item in enumerate(results, start=1):
-        players = []
-        if item["JugadoresPuntuaron"] and item["GolpesPuntuaron"]:
-            names = [n.strip() for n in item["JugadoresPuntuaron"].split(",")]
-            points = [p.strip() for p in item["GolpesPuntuaron"].split(",")]
-            for i, name in enumerate(names):
-                score = points[i] if i < len(points) else ""
-                players.append(
-                    f"<li><span class='player'>{name}</span><span class='score'>{score}</span></li>"
+def classification_sheets(model):
+    """Hojas que genera la clasificacion: ultima etapa, cada etapa y temporada."""
+    sheets = {CLASSIFICATION_SHEET: stage_result_rows(model)}
+    for stage_idx in range(model.played):
+        name = xlsx_sheet_title(
+            f"{STAGE_SHEET_PREFIX}{model.stage_names[stage_idx].lower()}"
+        )
+        while name in sheets:
+            name = xlsx_sheet_title(f"{name[:27]} {stage_idx + 1}")
+        sheets[name] = stage_result_rows(model, stage_idx)
+    sheets[SEASON_SHEET] = season_rows(model)
+    return sheets
+
+
+_XLSX_TITLE_RE = re.compile(r"[\[\]:*?/\\]")
+
+
+def xlsx_sheet_title(name):
+    """Nombre de hoja valido en Excel: sin ``[]:*?/\\`` y de 31 caracteres."""
+    return _XLSX_TITLE_RE.sub(" ", name)[:31].strip()
+
+
+def xlsx_column(idx):
+    letters = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def xlsx_sheet_xml(rows):
+    """XML de una hoja con cadenas en linea, sin tocar ``sharedStrings``."""
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<worksheet xmlns="{XLSX_MAIN_NS[1:-1]}"><sheetData>'
+    )
+    for row_idx, row in enumerate(rows, start=1):
+        cells = []
+        for col_idx, value in enumerate(row):
+            ref = f"{xlsx_column(col_idx)}{row_idx}"
+            if value is None or value == "":
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+            else:
+                text = escape(str(value), quote=False)
+                cells.append(
+                    f'<c r="{ref}" t="inlineStr"><is>'
+                    f'<t xml:space="preserve">{text}</t></is></c>'
                 )
-        medal = ""
-        if idx == 1:
-            medal = "gold"
-        elif idx == 2:
-            medal = "silver"
-        elif idx == 3:
-            medal = "bronze"
-        cards.append(
-            f"""
-      <article class=\"card {medal}\">
-        <div class=\"rank\">#{idx}</div>
-        <div class=\"team\">{item['Equipo']}</div>
-        <div class=\"total\">{item['TotalGolpes']} golpes</div>
-        <ul class=\"players\">{''.join(players)}</ul>
-      </article>
+        yield f'<row r="{row_idx}">{"".join(cells)}</row>'
+    yield "</sheetData></worksheet>"
+
+
+def _xml_insert(xml, closing_tag, fragment):
+    idx = xml.rindex(closing_tag)
+    return xml[:idx] + fragment + xml[idx:]
+
+
+_XLSX_SHEET_RE = re.compile(r"<(?:\w+:)?sheet\b[^>]*/>")
+_XLSX_DEFINED_NAME_RE = re.compile(
+    r"<(?:\w+:)?definedName\b[^>]*>.*?</(?:\w+:)?definedName>", re.S
+)
+
+
+def xlsx_rels_part(part):
+    folder, _, name = part.rpartition("/")
+    return f"{folder}/_rels/{name}.rels" if folder else f"_rels/{name}.rels"
+
+
+def xlsx_part_targets(archive, part, names):
+    """Partes internas del paquete a las que apuntan las relaciones de ``part``."""
+    rels_part = xlsx_rels_part(part)
+    if rels_part not in names:
+        return set()
+    rels = ElementTree.fromstring(archive.read(rels_part))
+    targets = set()
+    for rel in rels.iter(f"{XLSX_PKG_REL_NS}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            targets.add(target.lstrip("/"))
+        else:
+            target = posixpath.join(posixpath.dirname(part), target)
+            targets.add(posixpath.normpath(target))
+    return targets
+
+
+def xlsx_orphan_parts(archive, names, sheet_parts):
+    """Partes que solo cuelgan de ``sheet_parts``: dibujos, comentarios, tablas...
+
+    Lo que tambien enlaza otra parte que se conserva (una imagen compartida,
+    por ejemplo) no se toca.
+    """
+    known = set(names)
+    owned = set()
+    pending = list(sheet_parts)
+    while pending:
+        for target in xlsx_part_targets(archive, pending.pop(), known):
+            if target in known and target not in owned:
+                owned.add(target)
+                pending.append(target)
+    owned.difference_update(sheet_parts)
+    dropped = owned | set(sheet_parts)
+    shared = set()
+    for part in [""] + names:
+        if part not in dropped and not part.endswith(".rels"):
+            shared |= xlsx_part_targets(archive, part, known)
+    return owned - shared
+
+
+def _remove_workbook_sheets(workbook_xml, stale):
+    """Quita de ``workbook.xml`` las hojas ``stale``; devuelve sus ``r:id``.
+
+    Los nombres definidos locales de esas hojas desaparecen y los indices de
+    ``localSheetId``, ``activeTab`` y ``firstSheet`` se recolocan.
     """
+    removed = []
+    rel_ids = []
+    pieces = []
+    last = 0
+    for idx, match in enumerate(_XLSX_SHEET_RE.finditer(workbook_xml)):
+        name = re.search(r'\bname="([^"]*)"', match.group(0))
+        if name and unescape(name.group(1)) in stale:
+            removed.append(idx)
+            rel_ids.append(re.search(r':id="([^"]+)"', match.group(0)).group(1))
+            pieces.append(workbook_xml[last : match.start()])
+            last = match.end()
+    pieces.append(workbook_xml[last:])
+    workbook_xml = "".join(pieces)
+
+    def shift(idx):
+        idx = int(idx)
+        return None if idx in removed else idx - bisect.bisect_left(removed, idx)
+
+    def defined_name(match):
+        local = re.search(r'localSheetId="(\d+)"', match.group(0))
+        if local is None:
+            return match.group(0)
+        idx = shift(local.group(1))
+        if idx is None:
+            return ""
+        return match.group(0).replace(local.group(0), f'localSheetId="{idx}"', 1)
+
+    workbook_xml = _XLSX_DEFINED_NAME_RE.sub(defined_name, workbook_xml)
+    workbook_xml = re.sub(
+        r'\b(activeTab|firstSheet)="(\d+)"',
+        lambda m: f'{m.group(1)}="{shift(m.group(2)) or 0}"',
+        workbook_xml,
+    )
+    workbook_xml = re.sub(
+        r"<(?:\w+:)?definedNames>\s*</(?:\w+:)?definedNames>", "", workbook_xml
+    )
+    return workbook_xml, rel_ids
+
+
+def xlsx_app_titles(app_xml, sheet_names):
+    """Pone en ``docProps/app.xml`` la lista de hojas (``TitlesOfParts``).
+
+    Excel guarda primero el grupo de hojas en ``HeadingPairs`` y sus nombres
+    al principio de ``TitlesOfParts``; el resto (rangos con nombre) se deja.
+    """
+    heading = re.search(
+        r"<(?:\w+:)?HeadingPairs>.*?</(?:\w+:)?HeadingPairs>", app_xml, re.S
+    )
+    titles = re.search(
+        r"(<(?:\w+:)?TitlesOfParts>\s*<(\w+:)?vector\b[^>]*>)(.*?)"
+        r"(</(?:\w+:)?vector>)",
+        app_xml,
+        re.S,
+    )
+    if not heading or not titles or titles.start() < heading.end():
+        return app_xml
+    count = re.search(r"<(?:\w+:)?i4>(\d+)</(?:\w+:)?i4>", heading.group(0))
+    if not count:
+        return app_xml
+    prefix = titles.group(2) or ""
+    items = re.findall(rf"<{prefix}lpstr>.*?</{prefix}lpstr>", titles.group(3), re.S)
+    items = [
+        f"<{prefix}lpstr>{escape(name, quote=False)}</{prefix}lpstr>"
+        for name in sheet_names
+    ] + items[int(count.group(1)) :]
+    pairs = heading.group(0)
+    pairs = pairs[: count.start(1)] + str(len(sheet_names)) + pairs[count.end(1) :]
+    vector = re.sub(r'size="\d+"', f'size="{len(items)}"', titles.group(1), count=1)
+    return (
+        app_xml[: heading.start()]
+        + pairs
+        + app_xml[heading.end() : titles.start()]
+        + vector
+        + "".join(items)
+        + titles.group(4)
+        + app_xml[titles.end() :]
+    )
+
+
+def patch_xlsx_sheets(input_path, sheets, owned=None):
+    """Sustituye o anade hojas en un ``.xlsx`` sin reescribir el resto.
+
+    Las partes del zip que no cambian se copian byte a byte; solo se
+    generan las hojas de ``sheets`` y, si hay hojas nuevas, se anaden a
+    ``workbook.xml``, a sus relaciones y a ``[Content_Types].xml`` con
+    ediciones de texto que respetan los prefijos de espacio de nombres.
+    ``owned`` indica que hojas existentes son de la clasificacion: las que
+    ya no estan en ``sheets`` se borran. De las hojas sustituidas o borradas
+    se quitan tambien los dibujos, comentarios y demas partes que solo
+    colgaban de ellas, y ``docProps/app.xml`` recibe la nueva lista de
+    hojas. El resultado se escribe junto al original y lo sustituye con
+    ``os.replace``, asi que un fallo a mitad deja el Excel intacto.
+    """
+    input_path = Path(input_path)
+    with zipfile.ZipFile(input_path) as archive:
+        names = archive.namelist()
+        existing = xlsx_sheet_parts(archive)
+        workbook_xml = archive.read("xl/workbook.xml").decode("utf-8")
+        rels_xml = archive.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+        types_xml = archive.read("[Content_Types].xml").decode("utf-8")
+
+        stale = {
+            name
+            for name in existing
+            if name not in sheets and owned is not None and owned(name)
+        }
+        if stale:
+            workbook_xml, stale_rel_ids = _remove_workbook_sheets(workbook_xml, stale)
+            for rel_id in stale_rel_ids:
+                rels_xml = re.sub(
+                    rf'<Relationship\b[^>]*\bId="{re.escape(rel_id)}"[^>]*/>',
+                    "",
+                    rels_xml,
+                )
+
+        rel_prefix = re.search(
+            rf'xmlns:(\w+)="{re.escape(XLSX_REL_NS[1:-1])}"', workbook_xml
         )
+        sheet_ids = [int(v) for v in re.findall(r'sheetId="(\d+)"', workbook_xml)]
+        rel_ids = set(re.findall(r'Id="([^"]+)"', rels_xml))
+        taken = set(names)
+        parts = {}
+        for name in sheets:
+            if name in existing:
+                parts[name] = existing[name]
+                continue
+            number = len(existing) + len(parts) + 1
+            while f"xl/worksheets/sheet{number}.xml" in taken:
+                number += 1
+            part = f"xl/worksheets/sheet{number}.xml"
+            taken.add(part)
+            parts[name] = part
+            rel_id = f"rIdClas{number}"
+            while rel_id in rel_ids:
+                rel_id += "x"
+            rel_ids.add(rel_id)
+            sheet_id = max(sheet_ids, default=0) + 1
+            sheet_ids.append(sheet_id)
+            prefix = rel_prefix.group(1) if rel_prefix else "r"
+            if not rel_prefix:
+                workbook_xml = workbook_xml.replace(
+                    "<sheets>", f'<sheets xmlns:r="{XLSX_REL_NS[1:-1]}">', 1
+                )
+            workbook_xml = _xml_insert(
+                workbook_xml,
+                "</sheets>",
+                f'<sheet name="{escape(name)}" sheetId="{sheet_id}" '
+                f'{prefix}:id="{rel_id}"/>',
+            )
+            rels_xml = _xml_insert(
+                rels_xml,
+                "</Relationships>",
+                f'<Relationship Id="{rel_id}" Type="{XLSX_WORKSHEET_REL}" '
+                f'Target="/{part}"/>',
+            )
+            types_xml = _xml_insert(
+                types_xml,
+                "</Types>",
+                f'<Override PartName="/{part}" ContentType="{XLSX_WORKSHEET_TYPE}"/>',
+            )
 
-    team_colors = [
-        "#f8e1b8",
-        "#d6ecf4",
-        "#f4d6e0",
-        "#e1f1d2",
-        "#f1e1c4",
-        "#dfe2f6",
-        "#f6e0d2",
-        "#d2f0e9",
-    ]
+        replaced = {part for name, part in parts.items() if name in existing}
+        removed = {existing[name] for name in stale}
+        orphans = xlsx_orphan_parts(archive, names, replaced | removed)
+        # Excel reconstruye la cadena de calculo; una obsoleta obliga a reparar.
+        dropped = {"xl/calcChain.xml"} | removed | orphans
+        dropped |= {xlsx_rels_part(part) for part in replaced | removed | orphans}
+        if "xl/calcChain.xml" in names:
+            rels_xml = re.sub(
+                r'<Relationship [^>]*Target="[^"]*calcChain.xml"[^>]*/>', "", rels_xml
+            )
+        for part in dropped & set(names):
+            types_xml = re.sub(
+                rf'<Override PartName="/{re.escape(part)}"[^>]*/>', "", types_xml
+            )
+        patched = {
+            "xl/workbook.xml": workbook_xml,
+            "xl/_rels/workbook.xml.rels": rels_xml,
+            "[Content_Types].xml": types_xml,
+        }
+        if "docProps/app.xml" in names and (stale or len(parts) > len(replaced)):
+            sheet_order = [
+                unescape(re.search(r'\bname="([^"]*)"', sheet).group(1))
+                for sheet in _XLSX_SHEET_RE.findall(workbook_xml)
+            ]
+            patched["docProps/app.xml"] = xlsx_app_titles(
+                archive.read("docProps/app.xml").decode("utf-8"), sheet_order
+            )
 
-    logo_data = build_logo_data_uri(logo_path)
-    logo_html = (
-        f"<img class='logo' src='{logo_data}' alt='Logo' />" if logo_data else ""
+        with atomic_output(input_path) as tmp_path:
+            with zipfile.ZipFile(
+                tmp_path, "w", compression=zipfile.ZIP_DEFLATED
+            ) as out:
+                for info in archive.infolist():
+                    if info.filename in dropped or info.filename in replaced:
+                        continue
+                    if info.filename in patched:
+                        out.writestr(info, patched[info.filename].encode("utf-8"))
+                        continue
+                    with archive.open(info) as src, out.open(info, "w") as dst:
+                        shutil.copyfileobj(src, dst, 1 << 20)
+                for name, part in parts.items():
+                    with out.open(part, "w") as dst:
+                        for chunk in xlsx_sheet_xml(sheets[name]):
+                            dst.write(chunk.encode("utf-8"))
+    return list(parts)
+
+
+def write_classification_xlsx(input_path, model, keep=()):
+    """Escribe las hojas de la clasificacion y borra las de etapas que sobran.
+
+    ``keep`` son hojas de entrada que nunca se borran aunque empiecen por
+    ``STAGE_SHEET_PREFIX``.
+    """
+    return patch_xlsx_sheets(
+        input_path,
+        classification_sheets(model),
+        owned=lambda name: name.startswith(STAGE_SHEET_PREFIX) and name not in keep,
     )
-    html = f"""<!doctype html>
-<html lang=\"es\">
-<head>
-  <meta charset=\"utf-8\" />
-  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
-  <title>Clasificacion Equipos - Etapa 1 2026</title>
-  <link rel=\"preconnect\" href=\"https://fonts.googleapis.com\">
-  <link rel=\"preconnect\" href=\"https://fonts.gstatic.com\" crossorigin>
-  <link href=\"https://fonts.googleapis.com/css2?family=Fraunces:wght@600;700&family=IBM+Plex+Sans:wght@400;500;600&display=swap\" rel=\"stylesheet\">
-  <style>
-    :root {{
+
+
+TEAM_RESULT_COLUMNS = ["Equipo", "TotalGolpes", "Jugadores", "Mejores4"] + [
+    f"T{idx}" for idx in range(TEAM_SCORING_PLAYERS + 1, TIEBREAK_DEPTH + 1)
+]
+
+
+def team_result_rows(model):
+    """Filas de la ultima etapa con las columnas de ``equipos_etapa1_2026.ps1``."""
+    for team_idx in model.ranking():
+        strokes = model.team_strokes(team_idx)
+        tail = strokes[TEAM_SCORING_PLAYERS:TIEBREAK_DEPTH]
+        tail += [MISSING_STROKES] * (TIEBREAK_DEPTH - TEAM_SCORING_PLAYERS - len(tail))
+        yield [
+            model.team_names[team_idx],
+            model.team_total(team_idx),
+            len(strokes),
+            ", ".join(str(value) for value in strokes[:TEAM_SCORING_PLAYERS]),
+        ] + tail
+
+
+def build_csv(model, output_path, logo_path=None):
+    with open(output_path, "w", newline="", encoding="utf-8-sig") as handle:
+        writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+        writer.writerow(TEAM_RESULT_COLUMNS)
+        writer.writerows(team_result_rows(model))
+
+
+def build_parquet(model, output_path, logo_path=None):
+    try:
+        pyarrow = lazy_import("pyarrow")
+        parquet = lazy_import("pyarrow.parquet")
+    except ModuleNotFoundError:
+        print(
+            "pyarrow no esta instalado; se omite la generacion del Parquet.",
+            file=sys.stderr,
+        )
+        return
+    columns = list(zip(*team_result_rows(model))) or [()] * len(TEAM_RESULT_COLUMNS)
+    table = pyarrow.table(dict(zip(TEAM_RESULT_COLUMNS, map(list, columns))))
+    parquet.write_table(table, str(output_path))
+
+
+HTML_TEAM_COLORS = [
+    "#f8e1b8",
+    "#d6ecf4",
+    "#f4d6e0",
+    "#e1f1d2",
+    "#f1e1c4",
+    "#dfe2f6",
+    "#f6e0d2",
+    "#d2f0e9",
+]
+
+HTML_MEDALS = {1: "gold", 2: "silver", 3: "bronze"}
+
+HTML_FONT_LINKS = """<link rel="preconnect" href="https://fonts.googleapis.com">
+  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+  <link href="https://fonts.googleapis.com/css2?family=Fraunces:wght@600;700&family=IBM+Plex+Sans:wght@400;500;600&display=swap" rel="stylesheet">
+  """
+
+HTML_STYLES = """
+    :root {
       --bg1: #f7f1e3;
       --bg2: #e9f4f5;
       --ink: #1c2329;
@@ -276,20 +2211,20 @@ def build_html(results, output_path, classification_rows, player_groups, stage_n
       --gold: #c8a23d;
       --silver: #8a97a6;
       --bronze: #b26a4c;
-    }}
-    * {{ box-sizing: border-box; }}
-    body {{
+    }
+    * { box-sizing: border-box; }
+    body {
       margin: 0;
       font-family: 'IBM Plex Sans', sans-serif;
       color: var(--ink);
       background: radial-gradient(1200px 600px at 10% -10%, #fff 0%, transparent 70%),
                   linear-gradient(135deg, var(--bg1), var(--bg2));
-    }}
-        header {{
+    }
+        header {
             padding: 32px 24px 8px;
             text-align: center;
-        }}
-        .headline {{
+        }
+        .headline {
             font-family: 'Fraunces', serif;
             font-size: clamp(22px, 3vw, 30px);
             margin: 0 0 8px;
@@ -302,35 +2237,35 @@ def build_html(results, output_path, classification_rows, player_groups, stage_n
             display: inline-block;
             padding: 4px 12px;
             border-bottom: 3px solid #ffc400;
-        }}
-        .logo {{
+        }
+        .logo {
             width: 120px;
             height: auto;
             display: block;
             margin: 0 auto 12px;
             filter: drop-shadow(0 6px 12px rgba(0,0,0,0.18));
-        }}
-    h1 {{
+        }
+    h1 {
       font-family: 'Fraunces', serif;
       font-size: clamp(28px, 4vw, 44px);
       margin: 0 0 6px;
       letter-spacing: 0.5px;
-    }}
-    .subtitle {{
+    }
+    .subtitle {
       color: var(--muted);
       font-size: 14px;
       text-transform: uppercase;
       letter-spacing: 2px;
-    }}
-    .grid {{
+    }
+    .grid {
       display: grid;
       grid-template-columns: repeat(auto-fit, minmax(280px, 1fr));
       gap: 18px;
       padding: 24px;
       max-width: 1100px;
       margin: 0 auto 32px;
-    }}
-    .card {{
+    }
+    .card {
       background: #ffffffcc;
       border-radius: 18px;
       padding: 18px 20px 16px;
@@ -338,8 +2273,8 @@ def build_html(results, output_path, classification_rows, player_groups, stage_n
       border: 1px solid rgba(0,0,0,0.06);
       position: relative;
       overflow: hidden;
-    }}
-    .card::after {{
+    }
+    .card::after {
       content: "";
       position: absolute;
       inset: auto -20% -40% auto;
@@ -347,18 +2282,18 @@ def build_html(results, output_path, classification_rows, player_groups, stage_n
       height: 220px;
       border-radius: 50%;
       background: radial-gradient(circle, rgba(178,58,72,0.12), transparent 70%);
-    }}
-    .rank {{
+    }
+    .rank {
       font-family: 'Fraunces', serif;
       font-size: 22px;
       color: var(--accent);
-    }}
-    .team {{
+    }
+    .team {
       font-weight: 600;
       font-size: 18px;
       margin-top: 6px;
-    }}
-    .total {{
+    }
+    .total {
       font-size: 15px;
       color: var(--muted);
       margin-top: 10px;
@@ -370,178 +2305,454 @@ def build_html(results, output_path, classification_rows, player_groups, stage_n
       border-radius: 999px;
       background: rgba(28,35,41,0.06);
       box-shadow: inset 0 0 0 1px rgba(28,35,41,0.08);
-    }}
-    .players {{
+    }
+    .players {
       list-style: none;
       padding: 10px 0 0;
       margin: 0;
-    }}
-    .players li {{
+    }
+    .players li {
       display: flex;
       justify-content: space-between;
       gap: 12px;
       padding: 6px 0;
       border-bottom: 1px dashed rgba(0,0,0,0.08);
       font-size: 14px;
-    }}
-    .players li:last-child {{ border-bottom: none; }}
-    .score {{
+    }
+    .players li:last-child { border-bottom: none; }
+    .score {
       font-variant-numeric: tabular-nums;
       color: var(--accent);
       font-weight: 600;
-    }}
-    .gold {{
+    }
+    .gold {
       border: 1px solid rgba(200,162,61,0.55);
       background: linear-gradient(135deg, rgba(200,162,61,0.35), rgba(255,255,255,0.75));
-    }}
-    .gold .rank {{ color: var(--gold); }}
-    .gold .total {{
+    }
+    .gold .rank { color: var(--gold); }
+    .gold .total {
       background: linear-gradient(135deg, rgba(200,162,61,0.45), rgba(255,255,255,0.9));
       color: #6b4b00;
       box-shadow: 0 6px 14px rgba(200,162,61,0.35);
-    }}
-    .silver {{
+    }
+    .silver {
       border: 1px solid rgba(138,151,166,0.55);
       background: linear-gradient(135deg, rgba(138,151,166,0.35), rgba(255,255,255,0.75));
-    }}
-    .silver .rank {{ color: var(--silver); }}
-    .silver .total {{
+    }
+    .silver .rank { color: var(--silver); }
+    .silver .total {
       background: linear-gradient(135deg, rgba(138,151,166,0.45), rgba(255,255,255,0.9));
       color: #405060;
       box-shadow: 0 6px 14px rgba(138,151,166,0.35);
-    }}
-    .bronze {{
+    }
+    .bronze {
       border: 1px solid rgba(178,106,76,0.55);
       background: linear-gradient(135deg, rgba(178,106,76,0.35), rgba(255,255,255,0.75));
-    }}
-    .bronze .rank {{ color: var(--bronze); }}
-    .bronze .total {{
+    }
+    .bronze .rank { color: var(--bronze); }
+    .bronze .total {
       background: linear-gradient(135deg, rgba(178,106,76,0.45), rgba(255,255,255,0.9));
       color: #6a3924;
       box-shadow: 0 6px 14px rgba(178,106,76,0.35);
-    }}
-        .table-section {{
+    }
+        .table-section {
             max-width: 1100px;
             margin: 0 auto 32px;
             padding: 0 24px 32px;
-        }}
-        .table-card {{
+        }
+        .table-card {
             background: #ffffffd9;
             border-radius: 16px;
             padding: 16px;
             margin-top: 20px;
             box-shadow: 0 10px 26px rgba(0,0,0,0.08);
             border: 1px solid rgba(0,0,0,0.06);
-        }}
-        table {{
+        }
+        table {
             width: 100%;
             border-collapse: collapse;
             font-size: 13px;
-        }}
-        th, td {{
+        }
+        th, td {
             padding: 8px 10px;
             border-bottom: 1px solid rgba(0,0,0,0.08);
             text-align: center;
-        }}
-        th {{
+        }
+        th {
             font-size: 12px;
             text-transform: uppercase;
             letter-spacing: 1px;
             color: var(--muted);
             text-align: center;
-        }}
-        td.team-cell, th.team-cell {{
+        }
+        td.team-cell, th.team-cell {
             text-align: left;
             font-weight: 600;
-        }}
-        .scored {{
+        }
+        .scored {
             background: #c6efce;
-        }}
-        .team-block {{
+        }
+        .team-block {
             border-radius: 16px;
             padding: 14px 14px 6px;
             margin-bottom: 16px;
             border: 2px solid rgba(0,0,0,0.08);
-        }}
-        .team-title {{
+        }
+        .team-title {
             font-weight: 700;
             font-size: 16px;
             margin: 0 0 8px;
-        }}
-    footer {{
+        }
+    footer {
       text-align: center;
       color: var(--muted);
       font-size: 12px;
       padding: 0 0 24px;
-    }}
-  </style>
+    }
+  """
+
+HTML_TEMPLATE = """<!doctype html>
+<html lang="es">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
+  <title>Clasificacion Equipos - {{stage_label}} 2026</title>
+  {{head_assets}}
 </head>
 <body>
   <header>
-                {logo_html}
-        <div class=\"headline\">Campeonato de Espana por equipos 2026</div>
-    <div class=\"subtitle\">Etapa 1 · 2026</div>
+                {{logo}}
+        <div class="headline">Campeonato de Espana por equipos 2026</div>
+    <div class="subtitle">{{stage_label}} · 2026</div>
     <h1>Clasificacion de Equipos</h1>
   </header>
-  <section class=\"grid\">
-    {''.join(cards)}
+  <section class="grid">
+    {{cards}}
   </section>
-    <section class=\"table-section\">
-        <div class=\"table-card\">
+    <section class="table-section">
+        <div class="table-card">
             <h2>Clasificacion por etapas</h2>
             <table>
                 <thead>
                     <tr>
-                        <th class=\"team-cell\">Equipo</th>
-                        {''.join(f'<th>{name}</th>' for name in stage_names)}
+                        <th class="team-cell">Equipo</th>
+                        {{stage_headers}}
                         <th>Total</th>
                     </tr>
                 </thead>
                 <tbody>
-                    {''.join(
-                            '<tr>'
-                            f"<td class='team-cell'>{row['Equipo']}</td>" +
-                            ''.join(f"<td>{value}</td>" for value in row['Etapas']) +
-                            f"<td>{row['Total']}</td>"
-                            '</tr>'
-                            for row in classification_rows
-                    )}
+                    {{classification_rows}}
                 </tbody>
             </table>
         </div>
-        <div class=\"table-card\">
+        <div class="table-card">
             <h2>Detalle por equipos</h2>
-            {''.join(
-                    f"<div class='team-block' style='background:{team_colors[idx % len(team_colors)]}'>"
-                    f"<div class='team-title'>{group['Equipo']}</div>"
-                    "<table><thead><tr>"
-                    f"<th class='team-cell'>Jugador</th>" +
-                    ''.join(f"<th>{name}</th>" for name in stage_names) +
-                    "</tr></thead><tbody>" +
-                    ''.join(
-                            "<tr>" +
-                            f"<td class='team-cell'>{row['Jugador']}</td>" +
-                            ''.join(
-                                    f"<td class='{'scored' if scored else ''}'>{score}</td>"
-                                    for score, scored in zip(row['Etapas'], row['Scored'])
-                            ) +
-                            "</tr>"
-                            for row in group['Rows']
-                    ) +
-                    "</tbody></table></div>"
-                    for idx, group in enumerate(player_groups)
-            )}
+            {{team_blocks}}
         </div>
     </section>
   <footer>Footgolf · Clasificacion por equipos</footer>
 </body>
 </html>
 """
-    output_path.write_text(html, encoding="utf-8")
+
+_TEMPLATE_SLOT_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_html_template(template=HTML_TEMPLATE):
+    parts = []
+    pos = 0
+    for match in _TEMPLATE_SLOT_RE.finditer(template):
+        parts.append((template[pos : match.start()], match.group(1)))
+        pos = match.end()
+    parts.append((template[pos:], None))
+    return tuple(parts)
+
+
+def _html_cards(model, limit=None):
+    for idx, team_idx in enumerate(model.ranking()[:limit], start=1):
+        players = "".join(
+            f"<li><span class='player'>{escape(name)}</span>"
+            f"<span class='score'>{strokes}</span></li>"
+            for name, strokes in model.team_scorers(team_idx)
+        )
+        yield (
+            f"""
+      <article class="card {HTML_MEDALS.get(idx, '')}">
+        <div class="rank">#{idx}</div>
+        <div class="team">{escape(str(model.team_names[team_idx]))}</div>
+        <div class="total">{model.team_total(team_idx)} golpes</div>
+        <ul class="players">{players}</ul>
+      </article>
+    """
+        )
+
+
+def _html_stage_headers(stage_names):
+    return "".join(f"<th>{escape(str(name))}</th>" for name in stage_names)
+
+
+def _html_classification_rows(model, team_links=None):
+    for team_idx in model.season_order:
+        cells = "".join(f"<td>{value}</td>" for value in model.stage_cells(team_idx))
+        team = escape(str(model.team_names[team_idx]))
+        if team_links is not None:
+            team = f"<a href='{team_links[team_idx]}'>{team}</a>"
+        yield (
+            f"<tr><td class='team-cell'>{team}</td>"
+            f"{cells}<td>{model.season_totals[team_idx]}</td></tr>"
+        )
+
+
+def _html_team_blocks(model, team_range=None, anchors=False):
+    headers = _html_stage_headers(model.stage_names)
+    if team_range is None:
+        team_range = range(len(model.team_names))
+    for team_idx in team_range:
+        team = model.team_names[team_idx]
+        anchor = f" id='equipo-{team_idx + 1}'" if anchors else ""
+        color = HTML_TEAM_COLORS[team_idx % len(HTML_TEAM_COLORS)]
+        rows = []
+        for slot in model.team_slots(team_idx):
+            strokes, scored = model.player_cells(slot)
+            cells = "".join(
+                f"<td class='{'scored' if flag else ''}'>{value}</td>"
+                for value, flag in zip(strokes, scored)
+            )
+            player = escape(str(model.player_name(slot)))
+            rows.append(f"<tr><td class='team-cell'>{player}</td>{cells}</tr>")
+        yield (
+            f"<div class='team-block'{anchor} style='background:{color}'>"
+            f"<div class='team-title'>{escape(str(team))}</div>"
+            f"<table><thead><tr><th class='team-cell'>Jugador</th>{headers}"
+            f"</tr></thead><tbody>{''.join(rows)}</tbody></table></div>"
+        )
+
+
+def html_head_assets(assets="inline", output_dir=None, font_dir=FONT_DIR):
+    """Enlaces y estilos de la cabecera, en linea o como hoja de estilos aparte.
+
+    Si hay fuentes en ``font_dir`` se incrustan y la pagina no depende de
+    Google Fonts.
+    """
+    font_css = ASSETS.font_css(font_dir)
+    links = "" if font_css else HTML_FONT_LINKS
+    if assets == "external":
+        css = f"{font_css}{HTML_STYLES}".encode("utf-8")
+        name = ASSETS.publish(output_dir, "clasificacion.css", css)
+        return f'{links}<link rel="stylesheet" href="{name}">'
+    return f"{links}<style>{font_css}{HTML_STYLES}</style>"
+
+
+def html_logo_src(logo_path, assets="inline", output_dir=None):
+    if not logo_path or not Path(logo_path).exists():
+        return ""
+    if assets == "external":
+        return ASSETS.publish(output_dir, "logo.png", Path(logo_path).read_bytes())
+    return build_logo_data_uri(logo_path)
+
+
+def render_html_chunks(
+    model, logo_data="", head_assets=None, template=HTML_TEMPLATE, extra_slots=None
+):
+    if head_assets is None:
+        head_assets = html_head_assets()
+    slots = {
+        "head_assets": lambda: [head_assets],
+        "logo": lambda: (
+            [f"<img class='logo' src='{logo_data}' alt='Logo' />"] if logo_data else []
+        ),
+        "stage_label": lambda: [escape(model.stage_label)],
+        "cards": lambda: _html_cards(model),
+        "stage_headers": lambda: [_html_stage_headers(model.stage_names)],
+        "classification_rows": lambda: _html_classification_rows(model),
+        "team_blocks": lambda: _html_team_blocks(model),
+        **(extra_slots or {}),
+    }
+    for text, slot in compile_html_template(template):
+        yield text
+        if slot is not None:
+            yield from slots[slot]()
+
+
+def build_html(
+    model, output_path, logo_path, assets="inline", page_size=None, workers=1, name=None
+):
+    if page_size:
+        build_html_split(model, output_path, logo_path, page_size, workers, name)
+        return
+    output_dir = Path(output_path).parent
+    chunks = render_html_chunks(
+        model,
+        html_logo_src(logo_path, assets, output_dir),
+        html_head_assets(assets, output_dir),
+    )
+    with open(output_path, "w", encoding="utf-8") as handle:
+        handle.writelines(chunks)
+
+
+HTML_INDEX_CARDS = 12
+
+HTML_INDEX_TEMPLATE = HTML_TEMPLATE.replace("{{team_blocks}}", "{{page_links}}")
+
+HTML_PAGE_TEMPLATE = """<!doctype html>
+<html lang="es">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
+  <title>Detalle por equipos {{page_label}} - {{stage_label}} 2026</title>
+  {{head_assets}}
+</head>
+<body>
+  <header>
+    {{logo}}
+    <div class="headline">Campeonato de Espana por equipos 2026</div>
+    <div class="subtitle">{{stage_label}} · 2026</div>
+    <h1>Detalle por equipos {{page_label}}</h1>
+  </header>
+  <section class="table-section">
+    <div class="table-card">
+      <h2>{{page_nav}}</h2>
+      {{team_blocks}}
+    </div>
+  </section>
+  <footer>Footgolf · Clasificacion por equipos</footer>
+</body>
+</html>
+"""
+
+_HTML_PAGE_JOB = {}
+
+
+def html_page_name(stem, page_idx):
+    return f"{stem}-equipos-{page_idx + 1:03d}.html"
+
+
+def _init_html_pages(job):
+    _HTML_PAGE_JOB.clear()
+    _HTML_PAGE_JOB.update(job)
+
+
+def _write_html_page(page_idx):
+    job = _HTML_PAGE_JOB
+    model = job["model"]
+    page_size = job["page_size"]
+    page_count = job["page_count"]
+    first = page_idx * page_size
+    team_range = range(first, min(first + page_size, len(model.team_names)))
+    nav = [f"<a href='{job['index']}'>Clasificacion</a>"]
+    if page_idx > 0:
+        previous = html_page_name(job["stem"], page_idx - 1)
+        nav.append(f"<a href='{previous}'>Anterior</a>")
+    if page_idx + 1 < page_count:
+        following = html_page_name(job["stem"], page_idx + 1)
+        nav.append(f"<a href='{following}'>Siguiente</a>")
+    slots = {
+        "page_label": lambda: [f"{page_idx + 1}/{page_count}"],
+        "page_nav": lambda: [" · ".join(nav)],
+        "team_blocks": lambda: _html_team_blocks(model, team_range, anchors=True),
+    }
+    chunks = render_html_chunks(
+        model, job["logo"], job["head_assets"], HTML_PAGE_TEMPLATE, slots
+    )
+    name = html_page_name(job["stem"], page_idx)
+    with atomic_output(Path(job["output_dir"]) / name) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.writelines(chunks)
+    return name
+
+
+def html_data(model, team_links):
+    """Datos de la clasificacion para cargarlos desde el navegador."""
+    ranking = {team_idx: rank for rank, team_idx in enumerate(model.ranking(), 1)}
+    return {
+        "stage_label": model.stage_label,
+        "stages": model.stage_names,
+        "teams": [
+            {
+                "name": model.team_names[team_idx],
+                "rank": ranking[team_idx],
+                "total": model.team_total(team_idx),
+                "scorers": model.team_scorers(team_idx),
+                "points": model.stage_cells(team_idx),
+                "season_total": model.season_totals[team_idx],
+                "detail": team_links[team_idx],
+            }
+            for team_idx in model.season_order
+        ],
+    }
+
+
+def build_html_split(model, output_path, logo_path, page_size, workers=1, name=None):
+    """Indice con la clasificacion y paginas de detalle de ``page_size`` equipos.
+
+    Las paginas comparten la hoja de estilos y el logo publicados por
+    ``ASSETS`` y se generan en paralelo con ``workers`` procesos. Junto al
+    indice se escribe ``<nombre>.json`` con los datos de todos los equipos.
+    """
+    output_path = Path(output_path)
+    output_dir = output_path.parent
+    index = name or output_path.name
+    stem = Path(index).stem
+    team_count = len(model.team_names)
+    page_count = max(1, -(-team_count // page_size))
+    job = {
+        "model": model,
+        "page_size": page_size,
+        "page_count": page_count,
+        "stem": stem,
+        "index": index,
+        "output_dir": str(output_dir),
+        "head_assets": html_head_assets("external", output_dir),
+        "logo": html_logo_src(logo_path, "external", output_dir),
+    }
+    if workers > 1 and page_count > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_html_pages, initargs=(job,)
+        ) as pool:
+            pages = list(pool.map(_write_html_page, range(page_count)))
+    else:
+        _init_html_pages(job)
+        pages = [_write_html_page(page_idx) for page_idx in range(page_count)]
+        _HTML_PAGE_JOB.clear()
+    for stale in output_dir.glob(f"{stem}-equipos-*.html"):
+        if stale.name not in pages:
+            stale.unlink()
+
+    team_links = {
+        team_idx: f"{html_page_name(stem, team_idx // page_size)}#equipo-{team_idx + 1}"
+        for team_idx in range(team_count)
+    }
+    with atomic_output(output_dir / f"{stem}.json") as tmp_path:
+        tmp_path.write_text(
+            json.dumps(html_data(model, team_links), ensure_ascii=False),
+            encoding="utf-8",
+        )
+    page_links = "".join(
+        f"<a href='{page}'>{idx}</a> " for idx, page in enumerate(pages, start=1)
+    )
+    slots = {
+        "cards": lambda: _html_cards(model, HTML_INDEX_CARDS),
+        "classification_rows": lambda: _html_classification_rows(model, team_links),
+        "page_links": lambda: [f"<p>Paginas: {page_links.strip()}</p>"],
+    }
+    chunks = render_html_chunks(
+        model, job["logo"], job["head_assets"], HTML_INDEX_TEMPLATE, slots
+    )
+    with open(output_path, "w", encoding="utf-8") as handle:
+        handle.writelines(chunks)
+
+
+PDF_DARK = "#1c2329"
+PDF_GRID = "#c9d2d9"
+PDF_SCORED = "#c6efce"
+PDF_CHUNK_TEAMS = 120
 
 
-def build_pdf(results, output_path, classification_rows, player_groups, stage_names, logo_path):
+@functools.lru_cache(maxsize=None)
+def load_pdf_kit():
     try:
+        lazy_import("reportlab.platypus")
         from reportlab.lib import colors
         from reportlab.lib.pagesizes import A4
         from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
@@ -555,15 +2766,95 @@ def build_pdf(results, output_path, classification_rows, player_groups, stage_na
             TableStyle,
         )
     except ModuleNotFoundError:
-        print("reportlab no esta instalado; se omite la generacion del PDF.")
-        return
+        return None
 
     styles = getSampleStyleSheet()
+    styles["BodyText"].fontSize = 9
+    team_name_style = ParagraphStyle(
+        "team_name",
+        parent=styles["BodyText"],
+        fontSize=7,
+        leading=8,
+    )
+    grid_table_style = TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor(PDF_DARK)),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 8),
+            ("ALIGN", (1, 0), (-1, -1), "CENTER"),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor(PDF_GRID)),
+            ("FONTSIZE", (0, 1), (-1, -1), 7),
+        ]
+    )
+    team_title_styles = [
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, -1), colors.HexColor(color)),
+                ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 9),
+                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 4),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+            ]
+        )
+        for color in HTML_TEAM_COLORS
+    ]
+    return {
+        "colors": colors,
+        "A4": A4,
+        "mm": mm,
+        "Image": Image,
+        "Paragraph": Paragraph,
+        "SimpleDocTemplate": SimpleDocTemplate,
+        "Spacer": Spacer,
+        "Table": Table,
+        "TableStyle": TableStyle,
+        "styles": styles,
+        "team_name_style": team_name_style,
+        "grid_table_style": grid_table_style,
+        "team_title_styles": team_title_styles,
+        "scored_color": colors.HexColor(PDF_SCORED),
+        "page_width": A4[0] - 36 * mm,
+    }
+
+
+def merge_highlight_ranges(scored_rows, first_row=1, first_col=1):
+    ranges = []
+    open_runs = {}
+    for row_idx, scored in enumerate(scored_rows, start=first_row):
+        runs = set()
+        col_idx = 0
+        while col_idx < len(scored):
+            if scored[col_idx]:
+                start = col_idx
+                while col_idx + 1 < len(scored) and scored[col_idx + 1]:
+                    col_idx += 1
+                runs.add((start + first_col, col_idx + first_col))
+            col_idx += 1
+        for run in list(open_runs):
+            if run not in runs:
+                ranges.append(((run[0], open_runs.pop(run)), (run[1], row_idx - 1)))
+        for run in runs:
+            open_runs.setdefault(run, row_idx)
+    last_row = first_row + len(scored_rows) - 1
+    for run, start_row in open_runs.items():
+        ranges.append(((run[0], start_row), (run[1], last_row)))
+    return sorted(ranges, key=lambda item: (item[0][1], item[0][0]))
+
+
+def _pdf_head_flow(kit, model, logo_path):
+    colors = kit["colors"]
+    mm = kit["mm"]
+    Paragraph = kit["Paragraph"]
+    Spacer = kit["Spacer"]
+    Table = kit["Table"]
+    styles = kit["styles"]
     body_style = styles["BodyText"]
-    body_style.fontSize = 9
+    page_width = kit["page_width"]
 
-    max_team_len = max((len(str(item["Equipo"] or "")) for item in results), default=0)
-    page_width = A4[0] - 36 * mm
+    max_team_len = max((len(str(team or "")) for team in model.team_names), default=0)
     if max_team_len > 32:
         team_w = 90 * mm
         total_w = 30 * mm
@@ -575,38 +2866,33 @@ def build_pdf(results, output_path, classification_rows, player_groups, stage_na
 
     col_widths = [12 * mm, team_w, total_w, aportes_w]
 
-    doc = SimpleDocTemplate(
-        str(output_path),
-        pagesize=A4,
-        leftMargin=18 * mm,
-        rightMargin=18 * mm,
-        topMargin=16 * mm,
-        bottomMargin=16 * mm,
-    )
     flow = []
     if logo_path and logo_path.exists():
-        flow.append(Image(str(logo_path), width=60 * mm, height=28 * mm))
+        # 60 x 28 mm a 300 ppp; el PDF no necesita el logo a tamano completo.
+        logo = ASSETS.resized_image(logo_path, 709, 331)
+        flow.append(kit["Image"](str(logo), width=60 * mm, height=28 * mm))
         flow.append(Spacer(1, 4 * mm))
     flow.append(Paragraph("Campeonato de Espana por equipos 2026", styles["Title"]))
-    flow.append(Paragraph("Clasificacion de Equipos - Etapa 1 2026", styles["Heading2"]))
+    subtitle = f"Clasificacion de Equipos - {model.stage_label} 2026"
+    flow.append(Paragraph(subtitle, styles["Heading2"]))
     flow.append(Spacer(1, 6 * mm))
 
     data = [["#", "Equipo", "Total", "Aportes (golpes)"]]
-    for idx, item in enumerate(results, start=1):
-        total = f"{item['TotalGolpes']} golpes"
-        aportes = str(item["GolpesPuntuaron"] or "")
-        team = Paragraph(str(item["Equipo"]), body_style)
-        data.append([str(idx), team, total, aportes])
+    for idx, team_idx in enumerate(model.ranking(), start=1):
+        total = f"{model.team_total(team_idx)} golpes"
+        aportes = ", ".join(str(strokes) for _, strokes in model.team_scorers(team_idx))
+        team_name = escape(str(model.team_names[team_idx]), quote=False)
+        data.append([str(idx), Paragraph(team_name, body_style), total, aportes])
 
     table = Table(data, colWidths=col_widths)
-    style = TableStyle(
+    style = kit["TableStyle"](
         [
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1c2329")),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor(PDF_DARK)),
             ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
             ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
             ("FONTSIZE", (0, 0), (-1, 0), 10),
             ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#c9d2d9")),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor(PDF_GRID)),
             ("FONTSIZE", (0, 1), (-1, -1), 9),
             ("VALIGN", (0, 1), (-1, -1), "MIDDLE"),
         ]
@@ -614,7 +2900,7 @@ def build_pdf(results, output_path, classification_rows, player_groups, stage_na
 
     style.add("BACKGROUND", (2, 1), (2, -1), colors.HexColor("#f4f0e6"))
     style.add("FONTNAME", (2, 1), (2, -1), "Helvetica-Bold")
-    style.add("TEXTCOLOR", (2, 1), (2, -1), colors.HexColor("#1c2329"))
+    style.add("TEXTCOLOR", (2, 1), (2, -1), colors.HexColor(PDF_DARK))
     style.add("ALIGN", (2, 1), (2, -1), "CENTER")
 
     style.add("BOX", (0, 1), (-1, 1), 1.5, colors.HexColor("#c8a23d"))
@@ -633,104 +2919,133 @@ def build_pdf(results, output_path, classification_rows, player_groups, stage_na
     flow.append(table)
     flow.append(Spacer(1, 8 * mm))
 
-    team_name_style = ParagraphStyle(
-        "team_name",
-        parent=styles["BodyText"],
-        fontSize=7,
-        leading=8,
-    )
+    stage_names = model.stage_names
     clas_header = ["Equipo"] + stage_names + ["Total"]
     clas_data = [clas_header]
-    for row in classification_rows:
-        team_cell = Paragraph(str(row["Equipo"]), team_name_style)
-        clas_data.append([team_cell] + row["Etapas"] + [row["Total"]])
+    for team_idx in model.season_order:
+        team_name = escape(str(model.team_names[team_idx]), quote=False)
+        team_cell = Paragraph(team_name, kit["team_name_style"])
+        clas_data.append(
+            [team_cell] + model.stage_cells(team_idx) + [model.season_totals[team_idx]]
+        )
 
     clas_col_widths = [55 * mm] + [12 * mm] * len(stage_names) + [16 * mm]
     clas_table = Table(clas_data, colWidths=clas_col_widths)
-    clas_style = TableStyle(
-        [
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1c2329")),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("FONTSIZE", (0, 0), (-1, 0), 8),
-            ("ALIGN", (1, 0), (-1, -1), "CENTER"),
-            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#c9d2d9")),
-            ("FONTSIZE", (0, 1), (-1, -1), 7),
-        ]
-    )
-    clas_table.setStyle(clas_style)
+    clas_table.setStyle(kit["grid_table_style"])
     flow.append(Paragraph("Clasificacion por etapas", styles["Heading3"]))
     flow.append(clas_table)
     flow.append(Spacer(1, 6 * mm))
+    flow.append(Paragraph("Detalle por equipos", styles["Heading3"]))
+    return flow
 
-    team_colors = [
-        colors.HexColor("#f8e1b8"),
-        colors.HexColor("#d6ecf4"),
-        colors.HexColor("#f4d6e0"),
-        colors.HexColor("#e1f1d2"),
-        colors.HexColor("#f1e1c4"),
-        colors.HexColor("#dfe2f6"),
-        colors.HexColor("#f6e0d2"),
-        colors.HexColor("#d2f0e9"),
-    ]
 
-    flow.append(Paragraph("Detalle por equipos", styles["Heading3"]))
-    for idx, group in enumerate(player_groups):
-        team_title = Table([[group["Equipo"]]], colWidths=[page_width])
-        team_style = TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, -1), team_colors[idx % len(team_colors)]),
-                ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, -1), 9),
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-            ]
+def _pdf_detail_flow(kit, model, team_range):
+    mm = kit["mm"]
+    Table = kit["Table"]
+    title_styles = kit["team_title_styles"]
+    stage_names = model.stage_names
+    detail_header = ["Jugador"] + stage_names
+    detail_col_widths = [45 * mm] + [12 * mm] * len(stage_names)
+    flow = []
+    for team_idx in team_range:
+        team_title = Table(
+            [[model.team_names[team_idx]]], colWidths=[kit["page_width"]]
         )
-        team_title.setStyle(team_style)
+        team_title.setStyle(title_styles[team_idx % len(title_styles)])
         flow.append(team_title)
 
-        detail_header = ["Jugador"] + stage_names
         detail_data = [detail_header]
-        scored_cells = []
-        for row_idx, row in enumerate(group["Rows"], start=1):
-            detail_data.append([row["Jugador"]] + row["Etapas"])
-            for col_idx, scored in enumerate(row["Scored"], start=1):
-                if scored:
-                    scored_cells.append((col_idx, row_idx))
-
-        detail_col_widths = [45 * mm] + [12 * mm] * len(stage_names)
+        scored_rows = []
+        for slot in model.team_slots(team_idx):
+            strokes, scored = model.player_cells(slot)
+            detail_data.append([model.player_name(slot)] + strokes)
+            scored_rows.append(scored)
         detail_table = Table(detail_data, colWidths=detail_col_widths)
-        detail_style = TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1c2329")),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 8),
-                ("ALIGN", (1, 0), (-1, -1), "CENTER"),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#c9d2d9")),
-                ("FONTSIZE", (0, 1), (-1, -1), 7),
-            ]
-        )
-        for col_idx, row_idx in scored_cells:
-            detail_style.add(
-                "BACKGROUND",
-                (col_idx, row_idx),
-                (col_idx, row_idx),
-                colors.HexColor("#c6efce"),
+        detail_table.setStyle(kit["grid_table_style"])
+        highlights = merge_highlight_ranges(scored_rows)
+        if highlights:
+            detail_table.setStyle(
+                [
+                    ("BACKGROUND", start, end, kit["scored_color"])
+                    for start, end in highlights
+                ]
             )
-        detail_table.setStyle(detail_style)
         flow.append(detail_table)
-        flow.append(Spacer(1, 4 * mm))
+        flow.append(kit["Spacer"](1, 4 * mm))
+    return flow
+
 
+def build_pdf_part(output_path, model, logo_path, team_range=None, include_head=True):
+    kit = load_pdf_kit()
+    mm = kit["mm"]
+    doc = kit["SimpleDocTemplate"](
+        str(output_path),
+        pagesize=kit["A4"],
+        leftMargin=18 * mm,
+        rightMargin=18 * mm,
+        topMargin=16 * mm,
+        bottomMargin=16 * mm,
+    )
+    if team_range is None:
+        team_range = range(len(model.team_names))
+    flow = []
+    if include_head:
+        flow.extend(_pdf_head_flow(kit, model, logo_path))
+    flow.extend(_pdf_detail_flow(kit, model, team_range))
     doc.build(flow)
+    return str(output_path)
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Genera clasificacion por equipos y exporta HTML/PDF."
-    )
+def build_pdf(model, output_path, logo_path, workers=1):
+    if load_pdf_kit() is None:
+        print(
+            "reportlab no esta instalado; se omite la generacion del PDF.",
+            file=sys.stderr,
+        )
+        return
+
+    if workers > 1 and len(model.team_names) > PDF_CHUNK_TEAMS:
+        try:
+            from pypdf import PdfWriter
+        except ModuleNotFoundError:
+            PdfWriter = None
+        if PdfWriter is not None:
+            build_pdf_chunked(PdfWriter, model, output_path, logo_path, workers)
+            return
+
+    build_pdf_part(output_path, model, logo_path)
+
+
+def build_pdf_chunked(PdfWriter, model, output_path, logo_path, workers):
+    output_path = Path(output_path)
+    part_dir = Path(tempfile.mkdtemp(prefix=".pdf-parts-", dir=output_path.parent))
+    team_count = len(model.team_names)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = []
+            for part_idx, first_idx in enumerate(range(0, team_count, PDF_CHUNK_TEAMS)):
+                futures.append(
+                    pool.submit(
+                        build_pdf_part,
+                        part_dir / f"part{part_idx:04d}.pdf",
+                        model,
+                        logo_path,
+                        range(first_idx, min(first_idx + PDF_CHUNK_TEAMS, team_count)),
+                        part_idx == 0,
+                    )
+                )
+            parts = [future.result() for future in futures]
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(part)
+        with open(output_path, "wb") as handle:
+            writer.write(handle)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+
+def add_source_arguments(parser):
+    """Opciones de entrada, cache y vigilancia, comunes con el servidor."""
     parser.add_argument(
         "--input-xlsx",
         default=str(BASE_DIR / "imports" / "etapa1_2026_equipos.xlsx"),
@@ -741,53 +3056,653 @@ def main():
     )
     parser.add_argument(
         "--sheet-scores",
-        default="Clasificacion etapa 1 2026",
-        help="Nombre de la hoja de clasificacion individual.",
+        nargs="+",
+        default=["Clasificacion etapa 1 2026"],
+        help="Hojas de clasificacion individual, una por etapa y en orden.",
+    )
+    parser.add_argument(
+        "--scores-dir",
+        default=None,
+        help=(
+            "Directorio con un CSV o Parquet por etapa (en orden alfabetico) "
+            "en lugar de hojas."
+        ),
+    )
+    parser.add_argument(
+        "--scorecards",
+        nargs="+",
+        default=None,
+        help=(
+            "Modo Copa (best_hole_cup): hojas del Excel o ficheros CSV/Parquet con "
+            "tarjetas hoyo a hoyo (H1..H18); cada jugador puntua con la suma de "
+            "su mejor resultado en cada hoyo."
+        ),
+    )
+    parser.add_argument(
+        "--weekly-log",
+        default=None,
+        help=(
+            "Modo Semanal (best_card): CSV con una tarjeta por fila "
+            "(Jugador y Golpes, o H1..H18); puntua la tarjeta mas baja de cada "
+            "jugador. Con --watch solo se leen las filas nuevas."
+        ),
+    )
+    parser.add_argument(
+        "--max-cards",
+        type=int,
+        default=None,
+        help="Maximo de tarjetas por jugador en el modo Semanal (numberOfRounds).",
+    )
+    parser.add_argument(
+        "--teams-file",
+        default=None,
+        help=(
+            "CSV o Parquet con las plantillas, por columnas como la hoja de "
+            "equipos o en formato largo Equipo,Jugador."
+        ),
+    )
+    parser.add_argument(
+        "--stage-count",
+        type=int,
+        default=8,
+        help="Numero de etapas de la temporada (columnas de las tablas).",
+    )
+    parser.add_argument(
+        "--best-stages",
+        type=int,
+        default=None,
+        help="Mejores etapas que suman en la clasificacion (bestStagesToCount).",
+    )
+    parser.add_argument(
+        "--registry",
+        default=None,
+        help=(
+            "Base SQLite con jugadores, plantillas y alias confirmados; se crea "
+            "si no existe y aprende los alias nuevos de cada ejecucion."
+        ),
+    )
+    parser.add_argument(
+        "--teams-from-registry",
+        action="store_true",
+        help="Toma las plantillas del registro en lugar de la hoja de equipos.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(CACHE_DIR),
+        help="Directorio de la cache de hojas ya procesadas.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Lee todas las hojas del Excel sin usar la cache.",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=2.0,
+        help="Segundos entre comprobaciones en modo vigilancia.",
+    )
+    return parser
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Genera clasificacion por equipos y exporta HTML/PDF."
+    )
+    add_source_arguments(parser)
+    parser.add_argument(
+        "--output-cup",
+        default=None,
+        help="CSV opcional con la tarjeta de la Copa de cada jugador.",
     )
     parser.add_argument(
         "--output-html",
         default=str(BASE_DIR / "exports" / "clasificacion_equipos_etapa1_2026.html"),
         help="Ruta de salida HTML.",
     )
+    parser.add_argument(
+        "--html-assets",
+        choices=["inline", "external"],
+        default="inline",
+        help=(
+            "inline incrusta estilos y logo en el HTML; external los escribe "
+            "junto a el con el hash en el nombre para compartirlos entre paginas."
+        ),
+    )
+    parser.add_argument(
+        "--html-page-size",
+        type=int,
+        default=None,
+        help=(
+            "Divide el HTML en un indice y paginas de detalle con este numero de "
+            "equipos, mas un JSON con los datos (usa estilos y logo externos)."
+        ),
+    )
+    parser.add_argument(
+        "--html-workers",
+        type=int,
+        default=1,
+        help="Procesos para generar las paginas de detalle del HTML dividido.",
+    )
     parser.add_argument(
         "--output-pdf",
         default=str(BASE_DIR / "exports" / "clasificacion_equipos_etapa1_2026.pdf"),
         help="Ruta de salida PDF.",
     )
+    parser.add_argument(
+        "--output-csv",
+        default=str(BASE_DIR / "imports" / "equipos_etapa1_2026.csv"),
+        help="Ruta de salida CSV (mismas columnas que equipos_etapa1_2026.ps1).",
+    )
+    parser.add_argument(
+        "--output-parquet",
+        default=str(BASE_DIR / "exports" / "clasificacion_equipos_etapa1_2026.parquet"),
+        help="Ruta de salida Parquet (requiere pyarrow).",
+    )
+    parser.add_argument(
+        "--matching-report",
+        default=None,
+        help="Ruta opcional donde guardar los jugadores ambiguos y sin puntuacion.",
+    )
     parser.add_argument(
         "--update-xlsx",
         action="store_true",
-        help="Actualiza la hoja 'Clasificacion equipos' en el Excel de entrada.",
+        help=(
+            "Escribe en el Excel de entrada las hojas 'Clasificacion equipos', "
+            "una por etapa y 'Temporada equipos'."
+        ),
+    )
+    parser.add_argument(
+        "--formats",
+        type=parse_formats,
+        default=None,
+        help=(
+            "Salidas separadas por comas: html,pdf,xlsx,csv,parquet "
+            "(por defecto html,pdf)."
+        ),
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Muestra el tiempo de arranque y de importacion de cada dependencia.",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Muestra tiempos por fase, llamadas, aciertos de cache y memoria maxima.",
+    )
+    parser.add_argument(
+        "--timings-json", default=None, help="Guarda el informe de tiempos en JSON."
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        help="Guarda las fases como traza de Chrome (chrome://tracing, Perfetto).",
+    )
+    parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        default=1,
+        help="Procesos para generar el detalle del PDF por bloques de equipos.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Vigila la entrada y regenera HTML/PDF en cada cambio (sin xlsx).",
+    )
+    parser.add_argument(
+        "--batch",
+        default=None,
+        help="Manifiesto JSON con varios trabajos a generar en paralelo.",
+    )
+    parser.add_argument(
+        "--batch-summary",
+        default=None,
+        help="Ruta opcional donde guardar el resumen JSON del lote.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Procesos para el modo lote (por defecto, uno por nucleo).",
+    )
+    return parser
+
+
+def check_source_arguments(parser, args):
+    if args.weekly_log and Path(args.weekly_log).suffix.lower() not in CardLog.SUFFIXES:
+        parser.error("--weekly-log debe ser un CSV; exporta el Excel de tarjetas a CSV.")
+    return args
+
+
+def read_season_inputs(args, cache, registry=None, card_log=None):
+    workbook = WorkbookReader(args.input_xlsx, cache)
+    try:
+        if registry is not None and args.teams_from_registry:
+            teams = registry.teams()
+            if not teams:
+                raise ValueError(f"El registro {registry.path} no tiene plantillas.")
+        elif args.teams_file:
+            teams = read_table_file(args.teams_file, read_teams, cache)
+        else:
+            teams = workbook.read(args.sheet_teams, read_teams)
+        if args.scorecards:
+            sources = []
+            for source in args.scorecards:
+                if Path(source).suffix.lower() in TABLE_SOURCES:
+                    sources.append(read_table_file(source, read_scorecards, cache))
+                else:
+                    sources.append(workbook.read(source, read_scorecards))
+            with INSTRUMENTS.phase("best_hole_cup"):
+                cup = best_hole_cup(merge_scorecards(sources))
+            # El servidor no tiene opciones de salida.
+            if getattr(args, "output_cup", None):
+                build_cup_csv(cup, args.output_cup)
+            stages = [("Copa", cup.scores())]
+        elif args.weekly_log:
+            if card_log is None:
+                card_log = CardLog(args.weekly_log, args.max_cards)
+            rejected = card_log.board.rejected
+            with INSTRUMENTS.phase("best_card"):
+                card_log.poll()
+            if card_log.board.rejected > rejected:
+                print(
+                    f"Tarjetas por encima del limite de {args.max_cards}: "
+                    f"{card_log.board.rejected - rejected}"
+                )
+            stages = [("Semanal", card_log.scores)]
+        elif args.scores_dir:
+            stages = [
+                (path.stem, read_table_file(path, read_scores, cache))
+                for path in table_files(args.scores_dir)
+            ]
+        else:
+            stages = [
+                (name, workbook.read(name, read_scores)) for name in args.sheet_scores
+            ]
+    finally:
+        workbook.close()
+    return teams, stages
+
+
+def report_aliases(learned):
+    if learned:
+        print(f"Alias nuevos en el registro de jugadores: {learned}")
+
+
+def build_payload(engine, args):
+    if not engine.stages:
+        raise ValueError("No hay ninguna etapa con resultados.")
+    return engine.model(args.stage_count)
+
+
+def compute_classification(args):
+    cache = None if args.no_cache else SheetCache(args.cache_dir)
+    if cache is not None:
+        INSTRUMENTS.track_cache("sheet_cache", cache)
+    INSTRUMENTS.track_cache("normalize_name", NAME_NORMALIZER)
+    registry = PlayerRegistry(args.registry) if args.registry else None
+    try:
+        with INSTRUMENTS.phase("read_inputs"):
+            teams, stages = read_season_inputs(args, cache, registry)
+        if registry is not None and not args.teams_from_registry:
+            registry.sync_teams(teams)
+        engine = SeasonEngine(teams, best_stages=args.best_stages, registry=registry)
+        engine.add_stages(stages)
+        if registry is not None:
+            report_aliases(registry.learn(engine.stages))
+    finally:
+        if registry is not None:
+            registry.close()
+    with INSTRUMENTS.phase("matching_report"):
+        report_matching(engine.stages, args.matching_report)
+    with INSTRUMENTS.phase("season_model"):
+        payload = build_payload(engine, args)
+
+    if "xlsx" in args.formats:
+        with INSTRUMENTS.phase("xlsx"):
+            write_classification_xlsx(
+                args.input_xlsx, payload, keep=(args.sheet_teams, *args.sheet_scores)
+            )
+
+    return payload
+
+
+OUTPUT_BUILDERS = {
+    "html": build_html,
+    "pdf": build_pdf,
+    "csv": build_csv,
+    "parquet": build_parquet,
+}
+
+
+@contextmanager
+def atomic_output(output_path):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{output_path.name}.", suffix=".tmp", dir=output_path.parent
     )
-    args = parser.parse_args()
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp_path, 0o666 & ~umask)
+    try:
+        yield tmp_path
+        if tmp_path.stat().st_size:
+            os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def render_output(kind, payload, output_path, options=None):
+    """Ruta generada, o ``None`` si el constructor no escribio nada.
+
+    PDF y Parquet se omiten cuando falta reportlab o pyarrow; en ese caso el
+    fichero anterior, si existe, queda como estaba.
+    """
+    with INSTRUMENTS.phase(kind), atomic_output(output_path) as tmp_path:
+        OUTPUT_BUILDERS[kind](payload, tmp_path, LOGO_PATH, **(options or {}))
+        written = tmp_path.stat().st_size > 0
+    return str(output_path) if written else None
+
+
+def output_targets(args):
+    targets = [
+        (
+            "html",
+            args.output_html,
+            {
+                "assets": args.html_assets,
+                "page_size": args.html_page_size,
+                "workers": args.html_workers,
+                "name": Path(args.output_html).name,
+            },
+        ),
+        ("pdf", args.output_pdf, {"workers": args.pdf_workers}),
+        ("csv", args.output_csv, {}),
+        ("parquet", args.output_parquet, {}),
+    ]
+    return [target for target in targets if target[0] in args.formats]
+
+
+def parse_formats(value):
+    formats = {item.strip().lower() for item in value.split(",") if item.strip()}
+    unknown = formats.difference(OUTPUT_FORMATS)
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"formatos no soportados: {', '.join(sorted(unknown))}"
+        )
+    return formats
+
+
+def print_startup_profile(started):
+    for name, elapsed in IMPORT_TIMES.items():
+        print(f"Importacion {name}: {elapsed * 1000:.1f} ms", file=sys.stderr)
+    print(f"Total: {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+
+
+def run(args):
+    payload = compute_classification(args)
+    written = []
+    for kind, path, options in output_targets(args):
+        output = render_output(kind, payload, path, options)
+        if output is None:
+            print(f"Omitido {kind}: {path}", file=sys.stderr)
+        else:
+            written.append(output)
+    return written
+
+
+class ClassificationWatcher:
+    """Mantiene la temporada en memoria y la actualiza con cada cambio.
+
+    Las hojas o CSV sin cambios salen de ``SheetCache``; las que cambian se
+    comparan fila a fila con la lectura anterior y solo se recalculan los
+    equipos afectados.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.cache = SheetCache(None if args.no_cache else args.cache_dir)
+        INSTRUMENTS.track_cache("sheet_cache", self.cache)
+        INSTRUMENTS.track_cache("normalize_name", NAME_NORMALIZER)
+        self.registry = PlayerRegistry(args.registry) if args.registry else None
+        self.card_log = (
+            CardLog(args.weekly_log, args.max_cards) if args.weekly_log else None
+        )
+        self.engine = None
+        self._signature = None
+
+    def signature(self):
+        paths = [Path(self.args.input_xlsx)]
+        if self.args.teams_file:
+            paths.append(Path(self.args.teams_file))
+        for source in self.args.scorecards or ():
+            if Path(source).suffix.lower() in TABLE_SOURCES:
+                paths.append(Path(source))
+        if self.args.weekly_log:
+            paths.append(Path(self.args.weekly_log))
+        if self.args.scores_dir:
+            paths.extend(table_files(self.args.scores_dir))
+        signature = []
+        for path in paths:
+            if path.exists():
+                stat = path.stat()
+                signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def refresh(self):
+        signature = self.signature()
+        if signature == self._signature:
+            return None
+        teams, stages = read_season_inputs(
+            self.args, self.cache, self.registry, self.card_log
+        )
+        self._signature = signature
+        registry = self.registry
+        if registry is not None and not self.args.teams_from_registry:
+            registry.sync_teams(teams)
+        engine = self.engine
+        names = [name for name, _ in stages]
+        if (
+            engine is None
+            or teams != engine.teams
+            or names[: len(engine.stages)] != [stage.name for stage in engine.stages]
+        ):
+            engine = self.engine = SeasonEngine(
+                teams, best_stages=self.args.best_stages, registry=registry
+            )
+            engine.add_stages(stages)
+            affected = set(teams)
+        else:
+            affected = set()
+            for idx, (name, scores) in enumerate(stages):
+                if idx < len(engine.stages):
+                    touched = None
+                    card_log = self.card_log
+                    if card_log is not None and scores is card_log.scores:
+                        # Registro semanal: el mismo dict, cambiado en su sitio.
+                        if scores is engine.stages[idx].matcher.scores:
+                            touched = card_log.touched
+                    affected |= engine.update_stage(idx, scores, touched)
+                else:
+                    engine.add_stage(name, scores)
+                    affected |= set(teams)
+        if registry is not None and affected:
+            report_aliases(registry.learn(engine.stages))
+        return affected
+
+
+def watch(args):
+    watcher = ClassificationWatcher(args)
+    targets = output_targets(args)
+    source = args.weekly_log or args.scores_dir or args.input_xlsx
+    print(f"Vigilando {source} (Ctrl+C para salir)")
+    try:
+        while True:
+            try:
+                affected = watcher.refresh()
+            except Exception as exc:
+                print(
+                    f"No se pudo leer la entrada, se reintenta: {exc}",
+                    file=sys.stderr,
+                )
+                affected = None
+            if affected:
+                payload = build_payload(watcher.engine, args)
+                for kind, path, options in targets:
+                    render_output(kind, payload, path, options)
+                stamp = time.strftime("%H:%M:%S")
+                print(f"{stamp} equipos actualizados: {len(affected)}")
+            time.sleep(args.watch_interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+BATCH_PATH_OPTIONS = (
+    "input_xlsx",
+    "output_html",
+    "output_pdf",
+    "output_csv",
+    "output_parquet",
+    "matching_report",
+    "cache_dir",
+    "scores_dir",
+    "teams_file",
+    "registry",
+    "output_cup",
+    "weekly_log",
+)
 
-    input_path = Path(args.input_xlsx)
-    output_html = Path(args.output_html)
-    output_pdf = Path(args.output_pdf)
-    output_html.parent.mkdir(parents=True, exist_ok=True)
-    output_pdf.parent.mkdir(parents=True, exist_ok=True)
 
-    wb = load_workbook(input_path, data_only=True)
-    ws_teams = wb[args.sheet_teams]
-    ws_scores = wb[args.sheet_scores]
+def load_batch_jobs(manifest_path, parser):
+    manifest_path = Path(manifest_path)
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if isinstance(manifest, list):
+        manifest = {"jobs": manifest}
+    defaults = manifest.get("defaults", {})
+    jobs = []
+    for idx, entry in enumerate(manifest.get("jobs", []), start=1):
+        args = parser.parse_args([])
+        options = {**defaults, **entry}
+        name = str(options.pop("name", f"job{idx}"))
+        if any(name == other for other, _ in jobs):
+            raise ValueError(f"{name}: nombre de trabajo repetido en el manifiesto")
+        for option, value in options.items():
+            option = option.replace("-", "_")
+            if not hasattr(args, option) or option in ("batch", "batch_summary"):
+                raise ValueError(f"{name}: opcion desconocida '{option}'")
+            if option in BATCH_PATH_OPTIONS and value is not None:
+                value = str((manifest_path.parent / value).resolve())
+            if option == "sheet_scores" and isinstance(value, str):
+                value = [value]
+            if option == "formats" and isinstance(value, str):
+                value = parse_formats(value)
+            setattr(args, option, value)
+        jobs.append((name, resolve_formats(args)))
+    # Dos trabajos que parchean el mismo Excel en paralelo se pisan las hojas.
+    writers = {}
+    for name, args in jobs:
+        if "xlsx" in args.formats:
+            target = Path(args.input_xlsx).resolve()
+            if target in writers:
+                raise ValueError(
+                    f"{name}: {writers[target]} ya escribe en {target}; "
+                    "solo un trabajo del lote puede usar xlsx con cada Excel"
+                )
+            writers[target] = name
+    return jobs
+
+
+def run_batch(args, parser):
+    jobs = load_batch_jobs(args.batch, parser)
+    summary = {
+        name: {"job": name, "status": "ok", "outputs": [], "skipped": []}
+        for name, _ in jobs
+    }
+
+    def fail(name, exc):
+        summary[name]["status"] = "error"
+        summary[name]["error"] = f"{type(exc).__name__}: {exc}"
 
-    teams = read_teams(ws_teams)
-    scores = read_scores(ws_scores)
-    results = compute_results(teams, scores)
-    stage_names = [f"Etapa {i}" for i in range(1, 9)]
-    classification_rows = compute_team_points(results, len(stage_names))
-    player_groups = build_player_groups(teams, scores, len(stage_names))
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        computing = {
+            pool.submit(compute_classification, job_args): (name, job_args)
+            for name, job_args in jobs
+        }
+        rendering = []
+        for future in as_completed(computing):
+            name, job_args = computing[future]
+            try:
+                payload = future.result()
+            except Exception as exc:
+                fail(name, exc)
+                continue
+            for kind, path, options in output_targets(job_args):
+                future = pool.submit(render_output, kind, payload, path, options)
+                rendering.append((name, path, future))
+        for name, path, future in rendering:
+            try:
+                output = future.result()
+            except Exception as exc:
+                fail(name, exc)
+                continue
+            if output is None:
+                summary[name]["skipped"].append(str(path))
+            else:
+                summary[name]["outputs"].append(output)
 
+    report = list(summary.values())
+    for item in report:
+        detail = item.get("error") or ", ".join(item["outputs"])
+        print(f"[{item['status']}] {item['job']}: {detail}")
+        if item["skipped"]:
+            print(f"  omitidos: {', '.join(item['skipped'])}", file=sys.stderr)
+    if args.batch_summary:
+        Path(args.batch_summary).write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+    return 0 if all(item["status"] == "ok" for item in report) else 1
+
+
+def resolve_formats(args):
+    if args.formats is None:
+        args.formats = {"html", "pdf"}
     if args.update_xlsx:
-        write_clasificacion_sheet(wb, results)
-        wb.save(input_path)
+        args.formats = set(args.formats) | {"xlsx"}
+    return args
 
-    build_html(results, output_html, classification_rows, player_groups, stage_names, LOGO_PATH)
-    build_pdf(results, output_pdf, classification_rows, player_groups, stage_names, LOGO_PATH)
 
-    print(str(output_html))
-    print(str(output_pdf))
+def main(argv=None):
+    started = time.perf_counter()
+    parser = build_parser()
+    args = resolve_formats(parser.parse_args(argv))
+    check_source_arguments(parser, args)
+    if args.timings or args.timings_json or args.trace:
+        INSTRUMENTS.enable()
+        INSTRUMENTS.track_cache("assets", ASSETS)
+    ASSETS.cache_dir = None if args.no_cache else Path(args.cache_dir) / "assets"
+    if args.batch:
+        status = run_batch(args, parser)
+    elif args.watch:
+        status = watch(args)
+    else:
+        for path in run(args):
+            print(path)
+        status = 0
+    if args.profile_startup:
+        print_startup_profile(started)
+    if args.timings:
+        INSTRUMENTS.print_report()
+    if args.timings_json:
+        INSTRUMENTS.write_json(args.timings_json)
+    if args.trace:
+        INSTRUMENTS.write_chrome_trace(args.trace)
+    return status
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,292 @@
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import generar_clasificacion_equipos as clasificacion
+
+
+GZIP_MIN_BYTES = 512
+
+
+class Response:
+    """Respuesta ya preparada: cuerpo, version gzip y ETag por contenido.
+
+    Cada codificacion es una representacion distinta y lleva su propio ETag
+    fuerte: la version gzip termina en ``-gz``.
+    """
+
+    __slots__ = ("body", "gzipped", "etag", "gzip_etag", "content_type")
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+        self.gzipped = (
+            gzip.compress(body, compresslevel=6, mtime=0)
+            if len(body) >= GZIP_MIN_BYTES
+            else None
+        )
+
+
+def json_response(data):
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return Response(body.encode("utf-8"), "application/json; charset=utf-8")
+
+
+def team_data(model):
+    teams = []
+    for position, team_idx in enumerate(model.ranking(), start=1):
+        teams.append(
+            {
+                "posicion": position,
+                "equipo": model.team_names[team_idx],
+                "golpes": model.team_total(team_idx),
+                "jugadores": [
+                    {"jugador": name, "golpes": strokes}
+                    for name, strokes in model.team_scorers(team_idx)
+                ],
+            }
+        )
+    return {"etapa": model.stage_label, "equipos": teams}
+
+
+def season_data(model):
+    teams = []
+    for position, team_idx in enumerate(model.season_order, start=1):
+        teams.append(
+            {
+                "posicion": position,
+                "equipo": model.team_names[team_idx],
+                "puntos": model.stage_cells(team_idx)[: model.played],
+                "total": model.season_totals[team_idx],
+            }
+        )
+    return {"etapas": model.stage_names[: model.played], "equipos": teams}
+
+
+def player_data(engine):
+    """Clasificacion individual de la ultima etapa, con el equipo de cada uno."""
+    stage = engine.latest
+    teams = {}
+    for aggregate in stage.aggregates:
+        for source in aggregate.sources:
+            if source is not None:
+                teams.setdefault(source, aggregate.team)
+    entries = sorted(stage.matcher.scores.items(), key=lambda item: item[1][1])
+    players = []
+    position = 0
+    previous = None
+    for idx, (key, (name, strokes)) in enumerate(entries, start=1):
+        if strokes != previous:
+            position, previous = idx, strokes
+        players.append(
+            {
+                "posicion": position,
+                "jugador": name,
+                "golpes": strokes,
+                "equipo": teams.get(key),
+            }
+        )
+    return {"etapa": stage.name, "jugadores": players}
+
+
+def build_responses(engine, args, version):
+    model = clasificacion.build_payload(engine, args)
+    logo = clasificacion.html_logo_src(clasificacion.LOGO_PATH)
+    html = "".join(clasificacion.render_html_chunks(model, logo))
+    page = Response(html.encode("utf-8"), "text/html; charset=utf-8")
+    return {
+        "/": page,
+        "/clasificacion.html": page,
+        "/api/equipos.json": json_response(team_data(model)),
+        "/api/temporada.json": json_response(season_data(model)),
+        "/api/jugadores.json": json_response(player_data(engine)),
+        "/api/estado.json": json_response(
+            {
+                "version": version,
+                "actualizado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "etapa": model.stage_label,
+            }
+        ),
+    }
+
+
+class LeaderboardService:
+    """Clasificacion en memoria con las respuestas HTTP ya calculadas.
+
+    Solo el hilo de sondeo recalcula: usa ``ClassificationWatcher`` y, si
+    algo cambia, prepara todas las respuestas y las publica de golpe
+    sustituyendo ``responses``. Las peticiones solo leen ese diccionario, asi
+    que nunca ven una mezcla de versiones ni provocan recalculos.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.watcher = clasificacion.ClassificationWatcher(args)
+        self.responses = {}
+        self.version = 0
+
+    def refresh(self):
+        affected = self.watcher.refresh()
+        if affected is None or (not affected and self.responses):
+            return False
+        responses = build_responses(self.watcher.engine, self.args, self.version + 1)
+        self.version += 1
+        self.responses = responses
+        return True
+
+    def poll(self, stop, interval):
+        while not stop.wait(interval):
+            try:
+                if self.refresh():
+                    stamp = time.strftime("%H:%M:%S")
+                    print(f"{stamp} clasificacion actualizada (version {self.version})")
+            except Exception as exc:
+                print(
+                    f"No se pudo leer la entrada, se reintenta: {exc}",
+                    file=sys.stderr,
+                )
+
+
+def accepts_gzip(header):
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            quality = params.strip().lower()
+            if not quality.startswith("q="):
+                return True
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class LeaderboardHandler(BaseHTTPRequestHandler):
+    server_version = "ClasificacionFootgolf/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        response = self.server.service.responses.get(self.path.partition("?")[0])
+        if response is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "No encontrado")
+            return
+        gzipped = response.gzipped is not None and accepts_gzip(
+            self.headers.get("Accept-Encoding")
+        )
+        etag = response.gzip_etag if gzipped else response.etag
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._common_headers(etag)
+            self.end_headers()
+            return
+        body = response.gzipped if gzipped else response.body
+        self.send_response(HTTPStatus.OK)
+        self._common_headers(etag)
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _common_headers(self, etag):
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+
+    def log_message(self, format, *args):
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+
+class LeaderboardServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Los espectadores cierran conexiones keep-alive sin avisar.
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def make_server(args):
+    """Servidor listo para ``serve_forever``; ``--port 0`` elige un puerto libre."""
+    service = LeaderboardService(args)
+    if not service.refresh():
+        raise ValueError("No hay ninguna clasificacion que servir.")
+    server = LeaderboardServer((args.host, args.port), LeaderboardHandler)
+    server.service = service
+    server.access_log = args.access_log
+    return server
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Sirve en local la clasificacion por equipos e individual como JSON y "
+            "HTML, y la recalcula cuando cambia la entrada."
+        )
+    )
+    clasificacion.add_source_arguments(parser)
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Direccion en la que escuchar."
+    )
+    parser.add_argument(
+        "--port", type=int, default=8000, help="Puerto HTTP (0 elige uno libre)."
+    )
+    parser.add_argument(
+        "--access-log", action="store_true", help="Muestra cada peticion por stderr."
+    )
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = clasificacion.check_source_arguments(parser, parser.parse_args(argv))
+    clasificacion.ASSETS.cache_dir = (
+        None if args.no_cache else Path(args.cache_dir) / "assets"
+    )
+    server = make_server(args)
+    stop = threading.Event()
+    poller = threading.Thread(
+        target=server.service.poll, args=(stop, args.watch_interval), daemon=True
+    )
+    poller.start()
+    host, port = server.server_address[:2]
+    print(f"Sirviendo http://{host}:{port}/ (Ctrl+C para salir)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
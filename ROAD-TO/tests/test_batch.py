@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+import generar_clasificacion_equipos as clasificacion
+
+
+def write_manifest(tmp_path, jobs):
+    path = tmp_path / "lote.json"
+    path.write_text(json.dumps({"jobs": jobs}), encoding="utf-8")
+    return path
+
+
+def test_jobs_get_paths_relative_to_the_manifest(tmp_path):
+    path = write_manifest(
+        tmp_path, [{"name": "etapa1", "input-xlsx": "e1.xlsx"}, {"formats": "csv"}]
+    )
+    jobs = clasificacion.load_batch_jobs(path, clasificacion.build_parser())
+    assert [name for name, _ in jobs] == ["etapa1", "job2"]
+    assert jobs[0][1].input_xlsx == str(tmp_path / "e1.xlsx")
+    assert jobs[1][1].formats == {"csv"}
+
+
+def test_duplicate_job_names_are_rejected(tmp_path):
+    path = write_manifest(tmp_path, [{"name": "job2"}, {"formats": "csv"}])
+    with pytest.raises(ValueError, match="repetido"):
+        clasificacion.load_batch_jobs(path, clasificacion.build_parser())
+
+
+def test_jobs_writing_back_to_the_same_workbook_are_rejected(tmp_path):
+    path = write_manifest(
+        tmp_path,
+        [
+            {"name": "a", "input-xlsx": "e.xlsx", "update-xlsx": True},
+            {"name": "b", "input-xlsx": "e.xlsx", "formats": "html"},
+            {"name": "c", "input-xlsx": "./e.xlsx", "formats": "csv,xlsx"},
+        ],
+    )
+    with pytest.raises(ValueError, match="c: a ya escribe"):
+        clasificacion.load_batch_jobs(path, clasificacion.build_parser())
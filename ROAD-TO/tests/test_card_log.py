@@ -0,0 +1,36 @@
+import pytest
+
+import generar_clasificacion_equipos as clasificacion
+
+
+def test_poll_reads_only_appended_cards(tmp_path):
+    path = tmp_path / "semana.csv"
+    path.write_text("Pos;Jugador;Golpes\n1;Ana Pérez;60\n2;Luis;55\n", encoding="utf-8")
+    log = clasificacion.CardLog(path, max_cards=2)
+    assert log.poll() == ["ana perez", "luis"]
+
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write("3;ANA PEREZ;58\n4;Ana Perez;50\n5;Luis;5")
+    assert log.poll() == ["ana perez"]
+    assert log.scores["ana perez"] == ("Ana Pérez", 58)
+    assert log.board.rejected == 1
+
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write("4\n")
+    assert log.poll() == ["luis"]
+    assert log.scores["luis"] == ("Luis", 54)
+
+
+def test_rewritten_log_is_read_again(tmp_path):
+    path = tmp_path / "semana.csv"
+    path.write_text("Pos,Jugador,Golpes\n1,Ana,60\n", encoding="utf-8")
+    log = clasificacion.CardLog(path)
+    log.poll()
+    path.write_text("Pos,Jugador,Golpes\n1,Ana,70\n2,Eva,50\n", encoding="utf-8")
+    assert log.poll() == ["ana", "eva"]
+    assert log.scores == {"ana": ("Ana", 70), "eva": ("Eva", 50)}
+
+
+def test_excel_log_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="CSV"):
+        clasificacion.CardLog(tmp_path / "semana.xlsx")
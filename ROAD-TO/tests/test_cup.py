@@ -0,0 +1,45 @@
+import random
+from array import array
+
+import pytest
+
+import generar_clasificacion_equipos as clasificacion
+
+pytest.importorskip("numpy")
+
+
+def random_scorecards(rng, players):
+    scorecards = {}
+    for idx in range(players):
+        cards = array("h")
+        for _ in range(rng.randint(1, 5)):
+            # Tarjetas incompletas; algunos jugadores nunca juegan el hoyo 18.
+            missing = 0.3 if idx % 7 == 0 else 0.05
+            card = [
+                clasificacion.NO_HOLE
+                if rng.random() < missing or (idx % 5 == 0 and hole == 17)
+                else rng.randint(1, 9)
+                for hole in range(clasificacion.HOLES)
+            ]
+            cards.extend(card)
+        scorecards[f"jugador {idx}"] = (f"Jugador {idx}", cards)
+    return scorecards
+
+
+def cup_state(table):
+    return table.keys, table.names, table.cards, table.best, table.totals, table.order()
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_numpy_cup_matches_python(seed, monkeypatch):
+    scorecards = random_scorecards(random.Random(seed), 60)
+    monkeypatch.setattr(clasificacion, "NUMPY_MIN_CELLS", 0)
+    with_numpy = clasificacion.best_hole_cup(scorecards)
+    monkeypatch.setattr(clasificacion, "NUMPY_MIN_CELLS", float("inf"))
+    with_python = clasificacion.best_hole_cup(scorecards)
+
+    assert cup_state(with_numpy) == cup_state(with_python)
+    assert None in with_python.totals
+    assert any(total is not None for total in with_python.totals)
+    for row in with_python.best:
+        assert all(value is None or 1 <= value <= 9 for value in row)
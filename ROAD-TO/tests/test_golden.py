@@ -0,0 +1,40 @@
+"""Corpus congelado con la salida de ``normalize_name`` y ``find_score``.
+
+Los casos se generaron con la implementacion original del script (la de las
+dos ``re.sub`` por token de pais y la busqueda lineal por subcadena). Las
+optimizaciones posteriores deben reproducirlos exactamente; los jugadores sin
+coincidencia por subcadena guardan el resultado de la busqueda por prefijos.
+"""
+
+import json
+from pathlib import Path
+
+import generar_clasificacion_equipos as clasificacion
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+
+
+def load(name):
+    return json.loads((GOLDEN_DIR / name).read_text(encoding="utf-8"))
+
+
+def test_normalize_name_matches_golden_corpus():
+    clasificacion.NAME_NORMALIZER.cache_clear()
+    mismatches = [
+        (value, expected, clasificacion.normalize_name(value))
+        for value, expected in load("normalize_name.json")["cases"]
+        if clasificacion.normalize_name(value) != expected
+    ]
+    assert mismatches == []
+
+
+def test_find_score_matches_golden_corpus():
+    for stage in load("matching.json")["stages"]:
+        scores = {key: (name, strokes) for key, name, strokes in stage["scores"]}
+        matcher = clasificacion.PlayerMatcher(scores)
+        mismatches = []
+        for player, expected in stage["players"]:
+            match = clasificacion.find_score(player, matcher)
+            if (list(match) if match is not None else None) != expected:
+                mismatches.append((player, expected, match))
+        assert mismatches == []
@@ -0,0 +1,19 @@
+import generar_clasificacion_equipos as clasificacion
+
+
+def test_every_player_with_an_ambiguous_key_is_reported():
+    matcher = clasificacion.PlayerMatcher(
+        {
+            "jose perez lopez": ("José Pérez López", 60),
+            "jose perez garcia": ("José Pérez García", 62),
+        }
+    )
+    assert matcher.match("José Pérez") == ("José Pérez López", 60)
+    assert matcher.match("Jose Perez") == ("José Pérez López", 60)
+    assert matcher.match("Luis") is None
+    assert matcher.match("LUIS") is None
+
+    candidates = ["José Pérez López", "José Pérez García"]
+    assert matcher.ambiguous == {"José Pérez": candidates, "Jose Perez": candidates}
+    assert matcher.unmapped == {"Luis": "luis", "LUIS": "luis"}
+    assert matcher.approximate_count() == 2
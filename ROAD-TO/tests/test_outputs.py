@@ -0,0 +1,22 @@
+import generar_clasificacion_equipos as clasificacion
+
+
+def test_skipped_output_is_not_reported(tmp_path, monkeypatch):
+    def skip(model, output_path, logo_path):
+        pass
+
+    def write(model, output_path, logo_path):
+        output_path.write_text("nuevo", encoding="utf-8")
+
+    monkeypatch.setitem(clasificacion.OUTPUT_BUILDERS, "parquet", skip)
+    monkeypatch.setitem(clasificacion.OUTPUT_BUILDERS, "csv", write)
+    previous = tmp_path / "equipos.parquet"
+    previous.write_text("anterior", encoding="utf-8")
+
+    assert clasificacion.render_output("parquet", None, previous) is None
+    assert previous.read_text(encoding="utf-8") == "anterior"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["equipos.parquet"]
+
+    output = tmp_path / "equipos.csv"
+    assert clasificacion.render_output("csv", None, output) == str(output)
+    assert output.read_text(encoding="utf-8") == "nuevo"
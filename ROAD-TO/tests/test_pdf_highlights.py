@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+import generar_clasificacion_equipos as clasificacion
+
+
+def test_runs_merge_across_rows_and_split_when_they_change():
+    rows = [
+        [1, 1, 0, 1],
+        [1, 1, 0, 1],
+        [1, 1, 1, 1],
+        [],
+        [0, 1, 1],
+    ]
+    assert clasificacion.merge_highlight_ranges(rows) == [
+        ((1, 1), (2, 2)),
+        ((4, 1), (4, 2)),
+        ((1, 3), (4, 3)),
+        ((2, 5), (3, 5)),
+    ]
+
+
+def test_offsets_move_rows_and_columns():
+    rows = [[0, 1], [0, 1], [0, 0]]
+    assert clasificacion.merge_highlight_ranges(rows, first_row=3, first_col=5) == [
+        ((6, 3), (6, 4))
+    ]
+    assert clasificacion.merge_highlight_ranges([]) == []
+    assert clasificacion.merge_highlight_ranges([[], [0, 0]]) == []
+
+
+def test_run_open_until_the_last_row():
+    assert clasificacion.merge_highlight_ranges([[1], [1], [1]], first_row=0) == [
+        ((1, 0), (1, 2))
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_ranges_cover_exactly_the_scored_cells(seed):
+    rng = random.Random(seed)
+    rows = [
+        [rng.random() < 0.6 for _ in range(rng.choice([0, 4, 4, 4, 6]))]
+        for _ in range(rng.randint(1, 15))
+    ]
+    first_row, first_col = rng.randint(0, 3), rng.randint(0, 3)
+    expected = {
+        (col_idx + first_col, row_idx + first_row)
+        for row_idx, row in enumerate(rows)
+        for col_idx, scored in enumerate(row)
+        if scored
+    }
+    covered = []
+    for (col0, row0), (col1, row1) in clasificacion.merge_highlight_ranges(
+        rows, first_row, first_col
+    ):
+        covered.extend(
+            (col, row) for col in range(col0, col1 + 1) for row in range(row0, row1 + 1)
+        )
+    assert sorted(covered) == sorted(expected)
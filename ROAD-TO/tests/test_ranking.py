@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+import generar_clasificacion_equipos as clasificacion
+
+np = pytest.importorskip("numpy")
+
+
+def random_stage(rng, teams, roster):
+    scores = {}
+    team_map = {}
+    for team_idx in range(teams):
+        players = []
+        for player_idx in range(rng.randint(0, roster)):
+            name = f"jugador {team_idx} {player_idx}"
+            players.append(name)
+            if rng.random() < 0.8:
+                scores[name] = (name, rng.choice([rng.randint(40, 250), 40000]))
+        team_map[f"equipo {team_idx}"] = players
+    matcher = clasificacion.PlayerMatcher(scores)
+    return clasificacion.aggregate_teams(team_map, matcher)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_numpy_ranking_matches_python(seed):
+    rng = random.Random(seed)
+    stages = [random_stage(rng, 30, 12) for _ in range(3)]
+    totals, tiebreak, orders = clasificacion.score_strokes(
+        np, clasificacion.pack_strokes(np, stages)
+    )
+    for stage_idx, aggregates in enumerate(stages):
+        assert orders[stage_idx].tolist() == clasificacion.rank_aggregates(aggregates)
+        for team_idx, aggregate in enumerate(aggregates):
+            assert totals[team_idx, stage_idx] == aggregate.total
+            assert tuple(tiebreak[team_idx, :, stage_idx]) == aggregate.tiebreak
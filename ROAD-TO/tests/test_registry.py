@@ -0,0 +1,36 @@
+import generar_clasificacion_equipos as clasificacion
+
+
+def test_ambiguous_key_is_not_learned_for_any_player(tmp_path):
+    registry = clasificacion.PlayerRegistry(tmp_path / "jugadores.sqlite")
+    try:
+        registry.sync_teams({"Equipo A": ["José Pérez"], "Equipo B": ["Jose Perez"]})
+        engine = clasificacion.SeasonEngine(registry.teams(), registry=registry)
+        engine.add_stages(
+            [
+                (
+                    "Etapa 1",
+                    {
+                        "jose perez lopez": ("José Pérez López", 60),
+                        "jose perez garcia": ("José Pérez García", 62),
+                    },
+                )
+            ]
+        )
+        assert engine.latest.matcher.is_ambiguous("jose perez")
+        assert registry.learn(engine.stages) == 0
+        assert registry.aliases == {}
+    finally:
+        registry.close()
+
+
+def test_unambiguous_match_is_learned(tmp_path):
+    registry = clasificacion.PlayerRegistry(tmp_path / "jugadores.sqlite")
+    try:
+        registry.sync_teams({"Equipo A": ["Ana Pérez"]})
+        engine = clasificacion.SeasonEngine(registry.teams(), registry=registry)
+        engine.add_stages([("Etapa 1", {"ana perez ruiz": ("Ana Pérez Ruiz", 60)})])
+        assert registry.learn(engine.stages) == 1
+        assert registry.aliases == {"ana perez": ("ana perez ruiz",)}
+    finally:
+        registry.close()
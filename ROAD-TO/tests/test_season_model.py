@@ -0,0 +1,30 @@
+import generar_clasificacion_equipos as clasificacion
+
+
+def build_model(stage_names, stage_count=1):
+    engine = clasificacion.SeasonEngine({"Equipo A": ["Ana", "Luis"]})
+    engine.add_stages(
+        [(name, {"ana": ("Ana", 60), "luis": ("Luis", 62)}) for name in stage_names]
+    )
+    return engine.model(stage_count)
+
+
+def test_stage_labels_come_from_stage_names():
+    model = build_model(["Copa", "Semanal"], stage_count=3)
+    assert model.stage_names == ["Copa", "Semanal", "Etapa 3"]
+    assert model.stage_label == "Semanal"
+
+
+def test_standard_and_empty_stage_names_fall_back_to_etapa():
+    model = build_model(["Clasificacion etapa 2 2026", ""])
+    assert model.stage_names == ["Etapa 2", "Etapa 2"]
+    sheets = clasificacion.classification_sheets(model)
+    assert list(sheets)[1:3] == ["Equipos etapa 2", "Equipos etapa 2 2"]
+
+
+def test_strokes_above_int16_fit_in_the_model():
+    engine = clasificacion.SeasonEngine({"Equipo A": ["Ana", "Luis"]})
+    engine.add_stages([("Etapa 1", {"ana": ("Ana", 40000), "luis": ("Luis", 60)})])
+    model = engine.model(8)
+    assert model.team_scorers(0) == [("Luis", 60), ("Ana", 40000)]
+    assert model.team_total(0) == engine.latest.aggregates[0].total
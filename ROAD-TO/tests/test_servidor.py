@@ -0,0 +1,108 @@
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import servidor_clasificacion as servidor
+
+
+@pytest.fixture
+def server(tmp_path):
+    teams = tmp_path / "equipos.csv"
+    teams.write_text(
+        "Equipo,Jugador\nLeones,Ana Pérez\nLeones,Luis\nTigres,Eva\nTigres,Marta\n",
+        encoding="utf-8",
+    )
+    log = tmp_path / "semana.csv"
+    log.write_text("Jugador,Golpes\nAna Perez,60\nLuis,55\nEva,58\n", encoding="utf-8")
+    args = servidor.build_parser().parse_args(
+        [
+            "--input-xlsx",
+            str(tmp_path / "no_existe.xlsx"),
+            "--teams-file",
+            str(teams),
+            "--weekly-log",
+            str(log),
+            "--no-cache",
+            "--port",
+            "0",
+        ]
+    )
+    server = servidor.make_server(args)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, log
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(server, path, headers=None):
+    host, port = server.server_address[:2]
+    request = urllib.request.Request(f"http://{host}:{port}{path}", headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.headers, exc.read()
+
+
+def test_serves_json_and_not_modified(server):
+    server, _ = server
+    status, headers, body = fetch(server, "/api/equipos.json")
+    assert status == 200
+    teams = json.loads(body)["equipos"]
+    assert [team["equipo"] for team in teams] == ["Leones", "Tigres"]
+
+    status, _, body = fetch(
+        server, "/api/equipos.json", {"If-None-Match": headers["ETag"]}
+    )
+    assert status == 304
+    assert body == b""
+    assert fetch(server, "/no-existe")[0] == 404
+
+
+def test_gzip_has_its_own_etag(server):
+    server, _ = server
+    _, plain, body = fetch(server, "/")
+    status, headers, compressed = fetch(server, "/", {"Accept-Encoding": "gzip"})
+    assert status == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(compressed) == body
+    assert headers["ETag"] == plain["ETag"][:-1] + '-gz"'
+
+    # El ETag de la version sin comprimir no valida la version gzip.
+    status, _, _ = fetch(
+        server, "/", {"Accept-Encoding": "gzip", "If-None-Match": plain["ETag"]}
+    )
+    assert status == 200
+    status, _, _ = fetch(
+        server, "/", {"Accept-Encoding": "gzip", "If-None-Match": headers["ETag"]}
+    )
+    assert status == 304
+
+
+def test_refresh_publishes_new_cards(server):
+    server, log = server
+    _, headers, _ = fetch(server, "/api/jugadores.json")
+    assert json.loads(fetch(server, "/api/estado.json")[2])["version"] == 1
+    assert server.service.refresh() is False
+
+    with log.open("a", encoding="utf-8") as handle:
+        handle.write("Marta,50\n")
+    assert server.service.refresh() is True
+
+    assert json.loads(fetch(server, "/api/estado.json")[2])["version"] == 2
+    status, _, body = fetch(
+        server, "/api/jugadores.json", {"If-None-Match": headers["ETag"]}
+    )
+    assert status == 200
+    players = json.loads(body)["jugadores"]
+    assert players[0] == {
+        "posicion": 1,
+        "jugador": "Marta",
+        "golpes": 50,
+        "equipo": "Tigres",
+    }
@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+import generar_clasificacion_equipos as clasificacion
+
+TEAMS = {
+    "Leones": ["Ana", "Luis Gomez", "Jose Perez", "Marta"],
+    "Tigres": ["Eva", "Pablo", "Lucia Diaz", "Raul"],
+    "Osos": ["Carmen", "Diego", "Ines"],
+}
+SCORES = {
+    "ana": ("Ana", 60),
+    "luis gomez": ("Luis Gomez", 62),
+    "jose perez lopez": ("José Pérez López", 59),
+    "marta": ("Marta", 64),
+    "eva": ("Eva", 58),
+    "pablo": ("Pablo", 61),
+    "lucia diaz": ("Lucía Díaz", 63),
+    "carmen": ("Carmen", 57),
+    "diego": ("Diego", 66),
+}
+
+
+def model_state(model):
+    return {name: getattr(model, name) for name in clasificacion.SeasonModel.__slots__}
+
+
+def assert_same_as_fresh(engine, stages):
+    fresh = clasificacion.SeasonEngine(TEAMS)
+    fresh.add_stages(stages)
+    assert model_state(engine.model(8)) == model_state(fresh.model(8))
+
+
+def updated(first, second):
+    engine = clasificacion.SeasonEngine(TEAMS)
+    engine.add_stages([("Etapa 1", dict(SCORES)), ("Etapa 2", first)])
+    engine.update_stage(1, second)
+    assert_same_as_fresh(engine, [("Etapa 1", dict(SCORES)), ("Etapa 2", second)])
+    return engine
+
+
+def test_changed_score():
+    updated(dict(SCORES), dict(SCORES, eva=("Eva", 70)))
+
+
+def test_added_and_removed_keys():
+    first = dict(SCORES)
+    second = {key: value for key, value in SCORES.items() if key != "carmen"}
+    second["raul"] = ("Raúl", 55)
+    updated(first, second)
+    updated(second, first)
+
+
+def test_added_key_flips_approximate_match():
+    # "jose perez" deja de resolverse por subcadena a "jose perez lopez".
+    second = dict(SCORES, **{"jose perez": ("José Pérez", 70)})
+    engine = updated(dict(SCORES), second)
+    assert engine.latest.matcher.resolve_key("jose perez", "Jose Perez") == "jose perez"
+
+
+def test_added_key_makes_match_ambiguous():
+    first = dict(SCORES)
+    del first["ana"]
+    first["ana belen"] = ("Ana Belén", 65)
+    second = dict(first, **{"ana maria": ("Ana María", 56)})
+    engine = updated(first, second)
+    assert engine.latest.matcher.is_ambiguous("ana")
+    updated(second, first)
+
+
+def test_weekly_update_in_place():
+    scores = dict(SCORES)
+    engine = clasificacion.SeasonEngine(TEAMS)
+    engine.add_stages([("Semanal", scores)])
+    scores["jose perez"] = ("José Pérez", 50)
+    scores["eva"] = ("Eva", 75)
+    engine.update_stage(0, scores, ["jose perez", "eva"])
+    assert_same_as_fresh(engine, [("Semanal", dict(scores))])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_updates_match_full_recompute(seed):
+    rng = random.Random(seed)
+    pool = [
+        (clasificacion.normalize_name(name), name)
+        for players in TEAMS.values()
+        for name in players
+    ] + [("jose perez", "José Pérez"), ("ana belen", "Ana Belén"), ("diego r", "Diego R")]
+    engine = clasificacion.SeasonEngine(TEAMS)
+    scores = {key: (name, rng.randint(50, 80)) for key, name in rng.sample(pool, 8)}
+    engine.add_stages([("Etapa 1", scores)])
+    for _ in range(6):
+        scores = dict(scores)
+        for key, name in rng.sample(pool, 3):
+            if key in scores and rng.random() < 0.4:
+                del scores[key]
+            else:
+                scores[key] = (name, rng.randint(50, 80))
+        engine.update_stage(0, scores)
+        assert_same_as_fresh(engine, [("Etapa 1", scores)])
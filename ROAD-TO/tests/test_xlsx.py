@@ -0,0 +1,148 @@
+import re
+import zipfile
+
+import pytest
+
+import generar_clasificacion_equipos as clasificacion
+
+openpyxl = pytest.importorskip("openpyxl")
+from openpyxl.comments import Comment
+from openpyxl.workbook.defined_name import DefinedName
+
+APP_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'extended-properties" xmlns:vt="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/docPropsVTypes"><Application>Microsoft Excel</Application>'
+    '<HeadingPairs><vt:vector size="4" baseType="variant">'
+    "<vt:variant><vt:lpstr>Hojas de calculo</vt:lpstr></vt:variant>"
+    "<vt:variant><vt:i4>{count}</vt:i4></vt:variant>"
+    "<vt:variant><vt:lpstr>Rangos con nombre</vt:lpstr></vt:variant>"
+    "<vt:variant><vt:i4>1</vt:i4></vt:variant></vt:vector></HeadingPairs>"
+    '<TitlesOfParts><vt:vector size="{size}" baseType="lpstr">{titles}'
+    "<vt:lpstr>Rango</vt:lpstr></vt:vector></TitlesOfParts></Properties>"
+)
+
+
+def build_model(stages):
+    engine = clasificacion.SeasonEngine({"Leones": ["Ana", "Luis"], "Tigres": ["Eva"]})
+    engine.add_stages(
+        [
+            (
+                f"Clasificacion etapa {idx} 2026",
+                {
+                    "ana": ("Ana", 60 + idx),
+                    "luis": ("Luis", 62),
+                    "eva": ("Eva", 58 + idx),
+                },
+            )
+            for idx in range(1, stages + 1)
+        ]
+    )
+    return engine.model(8)
+
+
+def set_app_xml(path, sheet_names):
+    with zipfile.ZipFile(path) as archive:
+        entries = [(info, archive.read(info)) for info in archive.infolist()]
+    titles = "".join(f"<vt:lpstr>{name}</vt:lpstr>" for name in sheet_names)
+    app = APP_XML.format(
+        count=len(sheet_names), size=len(sheet_names) + 1, titles=titles
+    )
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as out:
+        for info, data in entries:
+            if info.filename == "docProps/app.xml":
+                data = app.encode("utf-8")
+            out.writestr(info, data)
+
+
+def package_parts(path):
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        overrides = set()
+        types = archive.read("[Content_Types].xml").decode("utf-8")
+        for part in re.findall(r'PartName="/([^"]+)"', types):
+            overrides.add(part)
+        targets = set()
+        for name in names:
+            if name.endswith(".rels"):
+                part = name.replace("_rels/", "")[: -len(".rels")]
+                targets |= clasificacion.xlsx_part_targets(archive, part, names)
+        app = archive.read("docProps/app.xml").decode("utf-8")
+        workbook = archive.read("xl/workbook.xml").decode("utf-8")
+    return names, overrides, targets, app, workbook
+
+
+def test_second_writeback_removes_stale_stage_sheets(tmp_path):
+    path = tmp_path / "etapas.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.title = "Equipos"
+    wb.create_sheet("Resumen")
+    wb.save(path)
+
+    clasificacion.write_classification_xlsx(path, build_model(3), keep=("Equipos",))
+    wb = openpyxl.load_workbook(path)
+    assert wb.sheetnames == [
+        "Equipos",
+        "Resumen",
+        "Clasificacion equipos",
+        "Equipos etapa 1",
+        "Equipos etapa 2",
+        "Equipos etapa 3",
+        "Temporada equipos",
+    ]
+    wb["Equipos etapa 2"]["A1"].comment = Comment("antigua", "test")
+    wb["Equipos etapa 3"]["A1"].comment = Comment("antigua", "test")
+    wb["Equipos etapa 3"].defined_names["Local3"] = DefinedName(
+        "Local3", attr_text="'Equipos etapa 3'!$A$1"
+    )
+    wb["Temporada equipos"].defined_names["Total"] = DefinedName(
+        "Total", attr_text="'Temporada equipos'!$A$1"
+    )
+    wb.save(path)
+    set_app_xml(path, wb.sheetnames)
+    assert any("comments" in name for name in package_parts(path)[0])
+
+    model = build_model(2)
+    clasificacion.write_classification_xlsx(path, model, keep=("Equipos",))
+
+    wb = openpyxl.load_workbook(path)
+    expected = [
+        "Equipos",
+        "Resumen",
+        "Clasificacion equipos",
+        "Equipos etapa 1",
+        "Equipos etapa 2",
+        "Temporada equipos",
+    ]
+    assert wb.sheetnames == expected
+    rows = [list(row) for row in wb["Equipos etapa 2"].iter_rows(values_only=True)]
+    assert rows == [list(row) for row in clasificacion.stage_result_rows(model, 1)]
+    assert wb["Equipos etapa 2"]["A1"].comment is None
+    assert list(wb["Temporada equipos"].defined_names) == ["Total"]
+
+    names, overrides, targets, app, workbook = package_parts(path)
+    assert not [name for name in names if "comments" in name or "vml" in name]
+    assert overrides <= names
+    assert targets <= names
+    assert "Local3" not in workbook
+    titles = app.split("<TitlesOfParts>")[1]
+    titles = re.findall(r"<vt:lpstr>([^<]*)</vt:lpstr>", titles)
+    assert titles == expected + ["Rango"]
+    assert f"<vt:i4>{len(expected)}</vt:i4>" in app
+
+
+def test_input_sheets_with_the_stage_prefix_are_kept(tmp_path):
+    path = tmp_path / "etapas.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.title = "Equipos 2026"
+    wb.save(path)
+    clasificacion.write_classification_xlsx(
+        path, build_model(1), keep=("Equipos 2026",)
+    )
+    assert openpyxl.load_workbook(path).sheetnames == [
+        "Equipos 2026",
+        "Clasificacion equipos",
+        "Equipos etapa 1",
+        "Temporada equipos",
+    ]
@@ -1,24 +1,138 @@
+import argparse
+import bisect
+import hashlib
+import json
+import os
 import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
-from pypdf import PdfReader
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "ROAD-TO" / "scripts"))
+from generar_clasificacion_equipos import fold_text as fold  # noqa: E402
 
+DEFAULT_PDF = r"public/footgolf-app_FIFG-Rules-of-the-Game-2025.pdf"
+CACHE_DIR = Path(".cache/fifg_pages")
+DEFAULT_INDEX = Path("scripts/fifg_rules_index.json")
+INDEX_VERSION = 1
+
+PART_RE = re.compile(r"^(PART\s+\d+\s*-\s*.+)$", re.IGNORECASE)
+RULE_RE = re.compile(r"^\d+-\d+(?:-\d+)?\s+[-–]\s+.+$")
+PART_NUMBER_RE = re.compile(r"^PART\s+(\d+)\s*[-–]\s*(.+)$", re.IGNORECASE)
+SECTION_RE = re.compile(r"^(\d+-\d+(?:-\d+)*(?:\.\d+)*)\s+(?:[-–]\s+)?(\S.*)$")
+TITLE_WEIGHT = 3
+
+
+def pdf_digest(path: Path) -> str:
+  sha = hashlib.sha256()
+  with path.open("rb") as handle:
+    for block in iter(lambda: handle.read(1 << 20), b""):
+      sha.update(block)
+  return sha.hexdigest()
+
+
+def extract_range(path: str, start: int, stop: int) -> list[tuple[int, str]]:
+  # Cada proceso abre su propio lector: PdfReader no se puede compartir.
+  from pypdf import PdfReader
 
-def main() -> None:
-  path = r"public/footgolf-app_FIFG-Rules-of-the-Game-2025.pdf"
   reader = PdfReader(path)
+  return [(idx, reader.pages[idx].extract_text() or "") for idx in range(start, stop)]
+
+
+def page_count(path: Path) -> int:
+  from pypdf import PdfReader
+
+  return len(PdfReader(str(path)).pages)
+
+
+def write_text(path: Path, text: str) -> None:
+  path.parent.mkdir(parents=True, exist_ok=True)
+  fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+  with os.fdopen(fd, "w", encoding="utf-8") as handle:
+    handle.write(text)
+  os.replace(tmp, path)
+
+
+def missing_ranges(missing: list[int], step: int) -> list[tuple[int, int]]:
+  """Tramos ``[inicio, fin)`` de paginas seguidas, de ``step`` paginas como mucho.
 
+  Las paginas ya cacheadas entre dos huecos no entran en ningun tramo.
+  """
+  ranges: list[tuple[int, int]] = []
+  for idx in missing:
+    if ranges and ranges[-1][1] == idx and idx - ranges[-1][0] < step:
+      ranges[-1] = (ranges[-1][0], idx + 1)
+    else:
+      ranges.append((idx, idx + 1))
+  return ranges
+
+
+def extract_pages(
+  path: Path,
+  cache_dir: Path | None = CACHE_DIR,
+  workers: int | None = None,
+  digest: str | None = None,
+) -> list[str]:
+  """Texto de cada pagina; las paginas ya extraidas salen de la cache en disco.
+
+  La cache se indexa por el hash del PDF y el numero de pagina, asi que
+  cambiar las expresiones de busqueda no obliga a extraer de nuevo. Quien ya
+  tiene el hash (``pdf_digest``) lo pasa en ``digest`` para no leer el PDF
+  dos veces.
+  """
+  folder = None
+  if cache_dir is not None:
+    folder = cache_dir / (digest or pdf_digest(path))
+  total = None
+  if folder is not None and (folder / "pages").exists():
+    total = int((folder / "pages").read_text(encoding="utf-8"))
+  if total is None:
+    total = page_count(path)
+    if folder is not None:
+      write_text(folder / "pages", str(total))
+
+  pages: list[str | None] = [None] * total
+  if folder is not None:
+    for idx in range(total):
+      cached = folder / f"{idx:05d}.txt"
+      if cached.exists():
+        pages[idx] = cached.read_text(encoding="utf-8")
+  missing = [idx for idx, text in enumerate(pages) if text is None]
+  if not missing:
+    return pages
+
+  workers = max(1, min(workers or os.cpu_count() or 1, len(missing)))
+  ranges = missing_ranges(missing, -(-len(missing) // workers))
+  if workers == 1:
+    results = [extract_range(str(path), start, stop) for start, stop in ranges]
+  else:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+      results = list(
+        pool.map(
+          extract_range,
+          [str(path)] * len(ranges),
+          [start for start, _ in ranges],
+          [stop for _, stop in ranges],
+        )
+      )
+  for result in results:
+    for idx, text in result:
+      pages[idx] = text
+      if folder is not None:
+        write_text(folder / f"{idx:05d}.txt", text)
+  return pages
+
+
+def find_headings(pages: list[str]) -> list[tuple[int, str]]:
   headings: list[tuple[int, str]] = []
   seen: set[str] = set()
 
-  part_re = re.compile(r"^(PART\s+\d+\s*-\s*.+)$", re.IGNORECASE)
-  rule_re = re.compile(r"^\d+-\d+(?:-\d+)?\s+[-–]\s+.+$")
-
-  for page_index, page in enumerate(reader.pages, start=1):
-    text = page.extract_text() or ""
+  for page_index, text in enumerate(pages, start=1):
     for line in (ln.strip() for ln in text.splitlines()):
       if not line:
         continue
-      if not (part_re.match(line) or rule_re.match(line)):
+      if not (PART_RE.match(line) or RULE_RE.match(line)):
         continue
 
       key = line.lower()
@@ -26,11 +140,215 @@ def main() -> None:
         continue
       seen.add(key)
       headings.append((page_index, line))
+  return headings
+
+
+def split_sections(pages: list[str]) -> list[dict]:
+  """Parte el texto en partes, reglas y subreglas (``1-2``, ``1-2-2.1``...).
+
+  Las entradas del indice del PDF aparecen como secciones sin cuerpo; de cada
+  numero se queda la aparicion con mas texto y, a igualdad, la ultima.
+  """
+  sections: list[dict] = []
+  current = None
+  for page_index, text in enumerate(pages, start=1):
+    for line in (ln.strip() for ln in text.splitlines()):
+      if not line:
+        continue
+      part = PART_NUMBER_RE.match(line)
+      rule = None if part else SECTION_RE.match(line)
+      if part or rule:
+        number, title = (part or rule).groups()
+        current = {
+          "number": number,
+          "title": title.strip().rstrip("."),
+          "pages": [page_index, page_index],
+          "body": [],
+        }
+        sections.append(current)
+      elif current is not None:
+        current["body"].append(line)
+        current["pages"][1] = page_index
+
+  best: dict[str, dict] = {}
+  for section in sections:
+    section["body"] = "\n".join(section["body"])
+    previous = best.get(section["number"])
+    if previous is None or len(section["body"]) >= len(previous["body"]):
+      best[section["number"]] = section
+  return [section for section in sections if best[section["number"]] is section]
+
+
+def build_index(documents: list[tuple[str, str, list[str]]]) -> dict:
+  """Indice invertido ``token -> [[seccion, peso], ...]`` de varios PDF.
+
+  ``documents`` son tuplas ``(nombre, sha256, paginas)``.
+  """
+  sources = []
+  sections = []
+  weights: dict[str, dict[int, int]] = {}
+  for doc_idx, (name, digest, pages) in enumerate(documents):
+    sources.append({"name": name, "sha256": digest, "pages": len(pages)})
+    for section in split_sections(pages):
+      section_idx = len(sections)
+      sections.append({"doc": doc_idx, **section})
+      for weight, text in ((TITLE_WEIGHT, section["title"]), (1, section["body"])):
+        for token in fold(text).split():
+          postings = weights.setdefault(token, {})
+          postings[section_idx] = postings.get(section_idx, 0) + weight
+  return {
+    "version": INDEX_VERSION,
+    "sources": sources,
+    "sections": sections,
+    "postings": {
+      token: sorted(weights[token].items()) for token in sorted(weights)
+    },
+  }
+
+
+def write_index(index: dict, path: Path) -> None:
+  write_text(path, json.dumps(index, ensure_ascii=False, separators=(",", ":")))
+
+
+def load_index(path: Path = DEFAULT_INDEX) -> dict:
+  index = json.loads(Path(path).read_text(encoding="utf-8"))
+  if index.get("version") != INDEX_VERSION:
+    raise ValueError(f"{path}: indice de otra version, vuelve a generarlo.")
+  index["tokens"] = list(index["postings"])
+  return index
+
+
+def term_postings(index: dict, term: str) -> dict[int, int]:
+  """Pesos por seccion de un termino; ``term*`` busca por prefijo."""
+  prefix = term.endswith("*")
+  term = fold(term.rstrip("*"))
+  found: dict[int, int] = {}
+  if not term:
+    return found
+  if not prefix:
+    for section_idx, weight in index["postings"].get(term, ()):
+      found[section_idx] = weight
+    return found
+  tokens = index["tokens"]
+  idx = bisect.bisect_left(tokens, term)
+  while idx < len(tokens) and tokens[idx].startswith(term):
+    for section_idx, weight in index["postings"][tokens[idx]]:
+      found[section_idx] = found.get(section_idx, 0) + weight
+    idx += 1
+  return found
+
+
+def search(index: dict, query: str, limit: int = 10) -> list[dict]:
+  """Secciones que contienen todos los terminos, las de mas peso primero."""
+  terms: list[str] = []
+  for term in query.split():
+    terms.extend([term] if term.endswith("*") else fold(term).split())
+  scores = None
+  for term in terms:
+    found = term_postings(index, term)
+    if scores is None:
+      scores = found
+    else:
+      scores = {idx: scores[idx] + found[idx] for idx in scores.keys() & found}
+    if not scores:
+      return []
+  ranked = sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+  return [index["sections"][idx] for idx, _ in ranked[:limit]]
+
+
+def lookup_rule(index: dict, number: str) -> list[dict]:
+  """La regla ``number`` y sus subreglas (``3-2`` incluye ``3-2-1``...)."""
+  number = number.strip().strip(".")
+  return [
+    section
+    for section in index["sections"]
+    if section["number"] == number
+    or section["number"].startswith((number + "-", number + "."))
+  ]
+
+
+def print_section(index: dict, section: dict, full: bool) -> None:
+  first, last = section["pages"]
+  pages = f"p{first}" if first == last else f"p{first}-{last}"
+  source = index["sources"][section["doc"]]["name"]
+  print(f"{source} {pages}: {section['number']} - {section['title']}")
+  if full and section["body"]:
+    print(section["body"])
+    print()
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(
+    description="Lista los titulos de partes y reglas de los PDF del reglamento FIFG."
+  )
+  parser.add_argument(
+    "pdfs", nargs="*", default=[DEFAULT_PDF], help="PDF del reglamento (uno o varios)."
+  )
+  parser.add_argument(
+    "--workers", type=int, default=None, help="Procesos para extraer paginas."
+  )
+  parser.add_argument(
+    "--cache-dir", default=str(CACHE_DIR), help="Cache del texto de cada pagina."
+  )
+  parser.add_argument(
+    "--no-cache", action="store_true", help="Extrae todas las paginas de nuevo."
+  )
+  parser.add_argument(
+    "--index", default=str(DEFAULT_INDEX), help="Fichero del indice de busqueda."
+  )
+  parser.add_argument(
+    "--build-index",
+    action="store_true",
+    help="Ademas de listar los titulos, genera el indice de los PDF indicados.",
+  )
+  parser.add_argument(
+    "--search",
+    default=None,
+    help="Busca terminos en el indice sin abrir los PDF ('term*' busca por prefijo).",
+  )
+  parser.add_argument(
+    "--rule", default=None, help="Muestra una regla y sus subreglas, p. ej. 3-2."
+  )
+  parser.add_argument(
+    "--limit", type=int, default=10, help="Maximo de resultados de --search."
+  )
+  parser.add_argument(
+    "--full", action="store_true", help="Imprime tambien el texto de cada seccion."
+  )
+  args = parser.parse_args()
+
+  if args.search or args.rule:
+    index = load_index(Path(args.index))
+    if args.rule:
+      results = lookup_rule(index, args.rule)
+    else:
+      results = search(index, args.search, args.limit)
+    if not results:
+      print("Sin resultados.")
+    for section in results:
+      print_section(index, section, args.full or bool(args.rule))
+    return
+
+  cache_dir = None if args.no_cache else Path(args.cache_dir)
+  documents = []
+  for path in args.pdfs:
+    digest = None
+    if cache_dir is not None or args.build_index:
+      digest = pdf_digest(Path(path))
+    pages = extract_pages(Path(path), cache_dir, args.workers, digest)
+    headings = find_headings(pages)
+    if args.build_index:
+      documents.append((Path(path).name, digest, pages))
+
+    if len(args.pdfs) > 1:
+      print(f"file={path}")
+    print(f"pages={len(pages)}")
+    print(f"headings={len(headings)}")
+    for page_index, line in headings:
+      print(f"p{page_index}: {line}")
 
-  print(f"pages={len(reader.pages)}")
-  print(f"headings={len(headings)}")
-  for page_index, line in headings:
-    print(f"p{page_index}: {line}")
+  if args.build_index:
+    write_index(build_index(documents), Path(args.index))
 
 
 if __name__ == "__main__":